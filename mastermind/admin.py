@@ -1,25 +1,199 @@
+from django.conf.urls import url
 from django.contrib import admin
-from mastermind.models import Profile, Game, Option, Slot, Submission
+from django.contrib.admin import actions
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+from mastermind.answerkey import get_answer_key
+from mastermind.feedback import update_feedback
+from mastermind.models import (
+    Profile, Game, Option, Slot, Submission, Standing, ViewProfile,
+)
+from mastermind.opengames import invalidate_open_games
+from mastermind.packing import (
+    add_usage, get_packed_option_ids, get_submission_slots,
+)
+from mastermind.standings import rebuild_standings
 
 
-class ProfileAdmin(admin.ModelAdmin):
+def delete_selected(modeladmin, request, queryset):
+    """Like the default delete action, which deletes the queryset without
+    calling delete_model, but runs the delete hooks of DeleteHooksMixin
+    around it."""
+    state = modeladmin.before_delete(queryset)
+    response = actions.delete_selected(modeladmin, request, queryset)
+    if response is None:
+        # The objects were deleted
+        modeladmin.after_delete(state)
+    return response
+delete_selected.short_description = actions.delete_selected.short_description
+
+
+class DeleteHooksMixin(object):
+    """Call before_delete with a queryset of the objects that are about
+    to be deleted, and after_delete with its result once they are, both
+    when deleting one object and when using the delete action, which
+    replaces the default one."""
+    actions = [delete_selected]
+
+    def before_delete(self, queryset):
+        return None
+
+    def after_delete(self, state):
+        pass
+
+    def delete_model(self, request, obj):
+        state = self.before_delete(type(obj).objects.filter(pk=obj.pk))
+        super(DeleteHooksMixin, self).delete_model(request, obj)
+        self.after_delete(state)
+
+
+class PackedUsageMixin(DeleteHooksMixin):
+    """Keep Option.packed_usage up to date when submissions are deleted
+    here, either directly or by deleting their profiles."""
+    # Lookup from Submission to the objects of this admin
+    submission_lookup = None
+
+    def before_delete(self, queryset):
+        return get_packed_option_ids(Submission.objects.filter(
+            **{'%s__in' % self.submission_lookup: queryset}))
+
+    def after_delete(self, option_ids):
+        add_usage(option_ids, sign=-1)
+
+
+class ProfileAdmin(PackedUsageMixin, admin.ModelAdmin):
     list_display = ('__str__',)
+    submission_lookup = 'profile'
 
 
-class GameAdmin(admin.ModelAdmin):
+class GameAdmin(DeleteHooksMixin, admin.ModelAdmin):
     list_display = ('__str__', 'owner')
+    list_select_related = ('owner', 'owner__user')
+
+    def save_model(self, request, obj, form, change):
+        super(GameAdmin, self).save_model(request, obj, form, change)
+        invalidate_open_games()
+
+    def after_delete(self, state):
+        invalidate_open_games()
+
+
+def update_game(game, deleted=False):
+    """Keep the stored feedback, the standings and the cached answer key
+    up to date when slots or options are changed here, like the game
+    admin views do."""
+    # The SubmissionSlots of deleted objects are deleted with them, so the
+    # standings change even if no feedback does.
+    if update_feedback(game) or deleted:
+        rebuild_standings(game)
+    game.bump_version()
+
 
+class BumpGameVersionMixin(DeleteHooksMixin):
+    def save_model(self, request, obj, form, change):
+        super(BumpGameVersionMixin, self).save_model(
+            request, obj, form, change)
+        update_game(obj.game)
 
-class OptionAdmin(admin.ModelAdmin):
+    def before_delete(self, queryset):
+        return list(Game.objects.filter(
+            pk__in=set(queryset.values_list('game_id', flat=True))))
+
+    def after_delete(self, games):
+        for game in games:
+            update_game(game, deleted=True)
+
+
+class OptionAdmin(BumpGameVersionMixin, admin.ModelAdmin):
     list_display = ('__str__', 'game')
+    list_select_related = ('game', 'alias_target')
 
 
-class SlotAdmin(admin.ModelAdmin):
+class SlotAdmin(BumpGameVersionMixin, admin.ModelAdmin):
     list_display = ('__str__', 'game')
+    list_select_related = ('game',)
 
 
-class SubmissionAdmin(admin.ModelAdmin):
+class SubmissionAdmin(PackedUsageMixin, admin.ModelAdmin):
     list_display = ('__str__', 'game', 'profile', 'created_time')
+    list_select_related = ('game', 'profile', 'profile__user')
+    readonly_fields = ('answers',)
+    submission_lookup = 'pk'
+
+    def before_delete(self, queryset):
+        games = list(Game.objects.filter(
+            pk__in=set(queryset.values_list('game_id', flat=True))))
+        return games, super(SubmissionAdmin, self).before_delete(queryset)
+
+    def after_delete(self, state):
+        games, state = state
+        super(SubmissionAdmin, self).after_delete(state)
+        # The standings count the deleted submissions, and the ETag of
+        # the game page counts them too.
+        for game in games:
+            rebuild_standings(game)
+
+    def answers(self, obj):
+        # Works for both packed and unpacked submissions
+        if obj.pk is None:
+            return ''
+        answer_key = get_answer_key(obj.game)
+        positions = {pk: (position, stem)
+                     for pk, position, stem, key_id in answer_key.slots}
+        submission_slots = get_submission_slots(
+            obj.game, answer_key, [obj])
+        submission_slots.sort(key=lambda ss: positions[ss.slot_id])
+        return format_html_join(
+            '\n', '<p>{}: {} {}</p>',
+            ((positions[ss.slot_id][1], ss.option.text,
+              ss.get_feedback_display()) for ss in submission_slots))
+    answers.short_description = 'svar'
+
+
+class StandingAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'best_correct', 'best_other',
+                    'submission_count')
+    list_select_related = ('game', 'profile', 'profile__user')
+
+
+class ViewProfileAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'view', 'game', 'duration', 'download')
+    list_select_related = ('game',)
+    fields = ('game', 'view', 'method', 'path', 'created_time', 'duration',
+              'download', 'summary_display')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        download = self.admin_site.admin_view(self.download_view)
+        urls = [url(r'^(?P<pk>\d+)/download/$', download,
+                    name='mastermind_viewprofile_download')]
+        return urls + super(ViewProfileAdmin, self).get_urls()
+
+    def download_view(self, request, pk):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(ViewProfile, pk=pk)
+        response = HttpResponse(bytes(profile.stats),
+                                content_type='application/octet-stream')
+        response['Content-Disposition'] = (
+            'attachment; filename="mastermind-%s.prof"' % profile.pk)
+        return response
+
+    def download(self, obj):
+        return format_html(
+            '<a href="{}">Hent .prof</a>',
+            reverse('admin:mastermind_viewprofile_download', args=[obj.pk]))
+    download.short_description = 'statistik'
+
+    def summary_display(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary)
+    summary_display.short_description = 'oversigt'
 
 
 admin.site.register(Profile, ProfileAdmin)
@@ -27,3 +201,5 @@ admin.site.register(Game, GameAdmin)
 admin.site.register(Option, OptionAdmin)
 admin.site.register(Slot, SlotAdmin)
 admin.site.register(Submission, SubmissionAdmin)
+admin.site.register(Standing, StandingAdmin)
+admin.site.register(ViewProfile, ViewProfileAdmin)
@@ -0,0 +1,148 @@
+import collections
+
+from django.core.cache import cache
+
+from mastermind.db import BATCH_SIZE
+from mastermind.instrumentation import record_cache
+from mastermind.models import Option, Slot
+
+
+AnswerKeyOption = collections.namedtuple(
+    'AnswerKeyOption', ['pk', 'kind', 'alias_target_id', 'text'])
+
+
+def normalize_text(text):
+    """Ignore case and differences in whitespace when matching texts."""
+    return ' '.join(text.split()).lower()
+
+
+class AnswerKey(object):
+    """Snapshot of the slots and options of a game.
+
+    Answer keys are cached under the game version, so Game.bump_version
+    must be called whenever slots or options change.
+    """
+
+    def __init__(self, slots, options):
+        # (pk, position, stem, key_id) ordered by position
+        self.slots = slots
+        # AnswerKeyOptions ordered by text
+        options = [AnswerKeyOption._make(o) for o in options]
+        self.options = options
+        self.slot_keys = {pk: key_id for pk, position, stem, key_id in slots}
+        self.correct_ids = set(
+            k for k in self.slot_keys.values() if k is not None)
+        self.options_by_pk = {o.pk: o for o in options}
+        self.option_ids = {text: pk for pk, kind, alias_target_id, text
+                           in options}
+        # Unconfirmed options have no canonical option
+        self.canonical_ids = {}
+        for pk, kind, alias_target_id, text in options:
+            if kind == Option.CANONICAL:
+                self.canonical_ids[pk] = pk
+            elif kind == Option.ALIAS:
+                self.canonical_ids[pk] = alias_target_id
+        # Normalized text -> canonical id of the confirmed options.
+        # Texts that normalize to options with different canonical
+        # options are left out.
+        self.normalized_ids = {}
+        ambiguous = set()
+        for pk, kind, alias_target_id, text in options:
+            canonical_id = self.canonical_ids.get(pk)
+            if canonical_id is None:
+                continue
+            normalized = normalize_text(text)
+            if self.normalized_ids.setdefault(
+                    normalized, canonical_id) != canonical_id:
+                ambiguous.add(normalized)
+        for normalized in ambiguous:
+            del self.normalized_ids[normalized]
+
+    @classmethod
+    def load(cls, game):
+        slots = Slot.objects.filter(game=game).order_by('position')
+        slots = slots.values_list('pk', 'position', 'stem', 'key_id')
+        options = Option.objects.filter(game=game).order_by('text')
+        options = options.values_list('pk', 'kind', 'alias_target_id', 'text')
+        return cls(list(slots), list(options))
+
+    def get_slots(self, game):
+        return [Slot(game=game, pk=pk, position=position, stem=stem,
+                     key_id=key_id)
+                for pk, position, stem, key_id in self.slots]
+
+    def _make_option(self, game, pk):
+        pk, kind, alias_target_id, text = self.options_by_pk[pk]
+        return Option(game=game, pk=pk, kind=kind,
+                      alias_target_id=alias_target_id, text=text)
+
+    def get_options(self, game):
+        options = [self._make_option(game, pk)
+                   for pk, kind, alias_target_id, text in self.options]
+        option_map = {o.pk: o for o in options}
+        for o in options:
+            if o.alias_target_id is not None:
+                o.alias_target = option_map[o.alias_target_id]
+        return options
+
+    def get_options_by_pk(self, game, pks):
+        """Return a dict mapping the given option ids to Options. Options
+        created after the answer key was built are loaded from the
+        database, and ids of options that no longer exist are left out."""
+        pks = set(pks)
+        result = {pk: self._make_option(game, pk)
+                  for pk in pks if pk in self.options_by_pk}
+        missing = list(pks - set(result))
+        for i in range(0, len(missing), BATCH_SIZE):
+            qs = Option.objects.filter(
+                game=game, pk__in=missing[i:i + BATCH_SIZE])
+            result.update((o.pk, o) for o in qs.order_by())
+        return result
+
+    def get_option(self, game, text):
+        """Return the option with the given text, or else the canonical
+        option of the confirmed options whose texts are equal to the text
+        when normalized. Returns None if there is no such option in the
+        answer key."""
+        try:
+            pk = self.option_ids[text]
+        except KeyError:
+            try:
+                pk = self.normalized_ids[normalize_text(text)]
+            except KeyError:
+                return None
+        option = self._make_option(game, pk)
+        if option.alias_target_id is not None:
+            option.alias_target = self._make_option(
+                game, option.alias_target_id)
+        return option
+
+    def get_options_by_text(self, game, texts):
+        """Return a dict mapping the given texts to Options found like
+        get_option, with their alias targets loaded. Options created after
+        the answer key was built are loaded from the database by exact
+        text, and texts with no option are left out."""
+        texts = set(texts)
+        result = {}
+        for text in texts:
+            option = self.get_option(game, text)
+            if option is not None:
+                result[text] = option
+        missing = list(texts - set(result))
+        for i in range(0, len(missing), BATCH_SIZE):
+            qs = Option.objects.filter(
+                game=game, text__in=missing[i:i + BATCH_SIZE])
+            qs = qs.select_related('alias_target').order_by()
+            result.update((o.text, o) for o in qs)
+        return result
+
+
+def get_answer_key(game):
+    # Change the prefix when the attributes of AnswerKey change.
+    cache_key = 'mastermind-answer-key-3-%s-%s' % (game.pk, game.version)
+    answer_key = cache.get(cache_key)
+    record_cache(answer_key is not None)
+    if answer_key is None:
+        answer_key = AnswerKey.load(game)
+        cache.set(cache_key, answer_key)
+    return answer_key
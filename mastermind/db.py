@@ -0,0 +1,51 @@
+from django.db.models import Case, When, Value
+
+from mastermind.models import Option
+
+
+# Keep each query below SQLite's limit on the number of query variables.
+BATCH_SIZE = 500
+
+
+def bulk_update(objs, fields, batch_size=100):
+    """Write the given fields of the given model instances to the database
+    using one UPDATE statement per batch.
+
+    Django 1.10 has no QuerySet.bulk_update, so each field is set using
+    a CASE expression on the primary key.
+    """
+    objs = list(objs)
+    if not objs:
+        return
+    model = type(objs[0])
+    fields = [model._meta.get_field(name) for name in fields]
+    for i in range(0, len(objs), batch_size):
+        batch = objs[i:i + batch_size]
+        updates = {}
+        for field in fields:
+            whens = [When(pk=o.pk,
+                          then=Value(getattr(o, field.attname),
+                                     output_field=field))
+                     for o in batch]
+            updates[field.attname] = Case(*whens, output_field=field)
+        model._default_manager.filter(
+            pk__in=[o.pk for o in batch]).update(**updates)
+
+
+def bulk_create_options(game, options, batch_size=BATCH_SIZE):
+    """Insert the given new Options of the game, set their primary keys
+    and return a dict mapping their texts to the primary keys.
+
+    bulk_create does not set the primary key on SQLite, so the keys are
+    read back by text, which is unique within a game.
+    """
+    options = list(options)
+    Option.objects.bulk_create(options, batch_size=batch_size)
+    texts = [o.text for o in options]
+    ids = {}
+    for i in range(0, len(texts), batch_size):
+        qs = Option.objects.filter(game=game, text__in=texts[i:i + batch_size])
+        ids.update(qs.order_by().values_list('text', 'pk'))
+    for o in options:
+        o.pk = ids[o.text]
+    return ids
@@ -0,0 +1,79 @@
+import csv
+import json
+
+from mastermind.answerkey import get_answer_key
+from mastermind.db import BATCH_SIZE
+from mastermind.models import Submission
+from mastermind.packing import get_answers
+
+
+COLUMNS = ('submission', 'profile', 'created_time', 'position', 'slot',
+           'option', 'canonical', 'feedback')
+
+
+def iter_rows(game, batch_size=BATCH_SIZE):
+    """Yield one tuple of COLUMNS per answer in the game, ordered by
+    submission and slot position.
+
+    Submissions are read in batches by primary key, so memory use does not
+    depend on the size of the game, even on databases where
+    QuerySet.iterator() reads the whole result at once.
+    """
+    answer_key = get_answer_key(game)
+    slots = {pk: (position, stem)
+             for pk, position, stem, key_id in answer_key.slots}
+    canonical_texts = {pk: answer_key.options_by_pk[canonical_id].text
+                       for pk, canonical_id
+                       in answer_key.canonical_ids.items()}
+    last = 0
+    while True:
+        submissions = Submission.objects.filter(game=game, pk__gt=last)
+        submissions = submissions.order_by('pk').values_list(
+            'pk', 'profile_id', 'created_time', 'packed_options')
+        submissions = list(submissions[:batch_size])
+        if not submissions:
+            return
+        last = submissions[-1][0]
+        answers = get_answers(
+            game, answer_key,
+            [(pk, packed) for pk, p, c, packed in submissions])
+        options = answer_key.get_options_by_pk(
+            game, (option_id for s, slot_id, option_id, f in answers))
+        rows = {}
+        for submission_id, slot_id, option_id, feedback in answers:
+            position, stem = slots[slot_id]
+            text = options[option_id].text if option_id in options else ''
+            rows.setdefault(submission_id, []).append(
+                (position, stem, text, canonical_texts.get(option_id, ''),
+                 feedback))
+        for pk, profile_id, created_time, packed in submissions:
+            row = (pk, profile_id, created_time.isoformat())
+            for answer in sorted(rows.get(pk, ()), key=lambda a: a[0]):
+                yield row + answer
+
+
+class Echo(object):
+    """File-like object whose write returns the written value, so that
+    csv.writer can be used to produce lines one at a time."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(game):
+    writer = csv.writer(Echo())
+    yield writer.writerow(COLUMNS)
+    for row in iter_rows(game):
+        yield writer.writerow(row)
+
+
+def iter_jsonl(game):
+    for row in iter_rows(game):
+        yield json.dumps(dict(zip(COLUMNS, row)), sort_keys=True) + '\n'
+
+
+# Format name -> (generator of lines, content type)
+FORMATS = {
+    'csv': (iter_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson; charset=utf-8'),
+}
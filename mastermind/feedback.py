@@ -0,0 +1,84 @@
+from django.db.models import Count
+
+from mastermind.answerkey import AnswerKey
+from mastermind.db import BATCH_SIZE
+from mastermind.models import Option, SubmissionSlot
+
+
+def get_feedback(key_id, option, correct_ids):
+    """Compute the feedback a SubmissionSlot with the given option receives
+    in a slot whose key has the given id.
+
+    correct_ids is the set of ids of options that are the key of some slot.
+    """
+    if option.kind == Option.ALIAS:
+        option_id = option.alias_target_id
+    elif option.kind == Option.UNCONFIRMED:
+        return SubmissionSlot.UNKNOWN
+    else:
+        option_id = option.pk
+    return get_canonical_feedback(key_id, option_id, correct_ids)
+
+
+def get_canonical_feedback(key_id, option_id, correct_ids):
+    """Like get_feedback, but given the id of the canonical option of the
+    chosen option, or None if it is unconfirmed."""
+    if key_id is None or option_id is None:
+        return SubmissionSlot.UNKNOWN
+    elif key_id == option_id:
+        return SubmissionSlot.CORRECT
+    elif option_id in correct_ids:
+        return SubmissionSlot.OTHER
+    else:
+        return SubmissionSlot.WRONG
+
+
+def update_feedback(game):
+    """Recompute the stored feedback of every SubmissionSlot in the game
+    and write the rows whose feedback changed.
+
+    Must be called whenever slot keys or option aliases change.
+    Returns True if any feedback changed, or if the game is packed, since
+    the feedback of packed submissions is not stored.
+    """
+    # Load the answer key from the database, since the cached answer key
+    # is replaced only after this when the game version is bumped.
+    answer_key = AnswerKey.load(game)
+    keys = answer_key.slot_keys
+    correct_ids = answer_key.correct_ids
+    canonical_ids = answer_key.canonical_ids
+    submission_slots = SubmissionSlot.objects.filter(
+        submission__game=game).order_by().values_list(
+            'pk', 'slot_id', 'option_id', 'feedback')
+    changed = {}
+    for pk, slot_id, option_id, old in submission_slots:
+        new = get_canonical_feedback(
+            keys[slot_id], canonical_ids.get(option_id), correct_ids)
+        if new != old:
+            changed.setdefault(new, []).append(pk)
+    for feedback, pks in changed.items():
+        for i in range(0, len(pks), BATCH_SIZE):
+            SubmissionSlot.objects.filter(
+                pk__in=pks[i:i + BATCH_SIZE]).update(feedback=feedback)
+    return bool(changed) or game.packed
+
+
+def get_scores(game):
+    """Count the feedback of every submission in the game in one query.
+
+    Returns a dict mapping submission ids to dicts mapping each of
+    SubmissionSlot.CORRECT, OTHER, WRONG and UNKNOWN to a count.
+    Slots left empty in a submission are not counted, and neither are
+    packed submissions, see mastermind.packing.get_scores.
+    """
+    qs = SubmissionSlot.objects.filter(submission__game=game).order_by()
+    qs = qs.values_list('submission_id', 'feedback').annotate(Count('pk'))
+    scores = {}
+    for submission_id, feedback, count in qs:
+        try:
+            score = scores[submission_id]
+        except KeyError:
+            score = scores[submission_id] = {
+                k: 0 for k, v in SubmissionSlot.FEEDBACKS}
+        score[feedback] = count
+    return scores
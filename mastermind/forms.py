@@ -1,7 +1,15 @@
+import codecs
 import collections
 from django import forms
-from mastermind.models import Option, Game
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from mastermind.models import Option, Game, Submission, SubmissionSlot
+from mastermind.db import bulk_create_options
 from mastermind.fields import DistinctLinesField
+from mastermind.importer import READERS, GameData
+from mastermind.feedback import get_feedback
+from mastermind.packing import add_usage, extend_layout, pack
+from mastermind.standings import record_submission
 
 
 class GameCreateForm(forms.Form):
@@ -10,29 +18,63 @@ class GameCreateForm(forms.Form):
     options = DistinctLinesField()
 
 
+class GameImportForm(forms.Form):
+    title = forms.CharField(max_length=100)
+    file = forms.FileField()
+    format = forms.ChoiceField(choices=[
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ])
+    mode = forms.ChoiceField(choices=Game.MODES, initial=Game.INITIAL)
+
+    def clean(self):
+        cleaned_data = super(GameImportForm, self).clean()
+        if 'file' in cleaned_data and 'format' in cleaned_data:
+            read = READERS[cleaned_data['format']]
+            lines = codecs.iterdecode(cleaned_data['file'], 'utf-8-sig')
+            try:
+                cleaned_data['data'] = GameData.parse(read(lines))
+            except UnicodeDecodeError:
+                self.add_error('file', 'Filen skal være i UTF-8')
+            except ValidationError as exn:
+                self.add_error('file', exn)
+        return cleaned_data
+
+
 class GameUnconfirmedOptionsForm(forms.Form):
     def __init__(self, **kwargs):
         self.options = kwargs.pop('options')
+        suggestions = kwargs.pop('suggestions')
         super(GameUnconfirmedOptionsForm, self).__init__(**kwargs)
         for o in self.options:
             k = 'o-%s' % o.pk
+            help_text = []
+            if getattr(o, 'usage', None) is not None:
+                help_text.append(
+                    'Brugt 1 gang.' if o.usage == 1 else
+                    'Brugt %s gange.' % o.usage)
+            if o.text in suggestions:
+                help_text.append('Forslag: %s' % suggestions[o.text])
             self.fields[k] = forms.CharField(
-                initial=o.text, label=o.text, required=False)
+                initial=o.text, label=o.text, required=False,
+                help_text=' '.join(help_text))
 
 
 class GameSubmissionForm(forms.Form):
     def __init__(self, **kwargs):
         self.game = kwargs.pop('game')
+        self.answer_key = kwargs.pop('answer_key')
         self.slots = kwargs.pop('slots')
         slots_initial = kwargs.pop('slots_initial')
         super(GameSubmissionForm, self).__init__(**kwargs)
         for s in self.slots:
             k = 's-%s' % s.pk
             self.fields[k] = forms.CharField(
-                initial=slots_initial.get(s, ''), label=s.stem, required=False)
+                initial=slots_initial.get(s.pk, ''), label=s.stem,
+                required=False)
 
     def clean(self):
-        options = {}
+        texts = {}
         for s in self.slots:
             k = 's-%s' % s.pk
             try:
@@ -42,26 +84,76 @@ class GameSubmissionForm(forms.Form):
             if not v:
                 self.cleaned_data[k] = None
                 continue
+            texts[k] = v
+        options = self.answer_key.get_options_by_text(
+            self.game, texts.values())
+        for k, v in texts.items():
             try:
                 option = options[v]
             except KeyError:
-                try:
-                    option = Option.objects.get(game=self.game, text=v)
-                except Option.DoesNotExist:
-                    option = Option(
-                        game=self.game, text=v, kind=Option.UNCONFIRMED)
-                    option.clean()
+                option = Option(
+                    game=self.game, text=v, kind=Option.UNCONFIRMED)
+                option.clean()
                 options[v] = option
             self.cleaned_data[k] = option
         return self.cleaned_data
 
+    def save(self, profile):
+        """Save the guess with its new options and feedback, and return the
+        Submission and its SubmissionSlots, which are not saved if the game
+        is packed."""
+        submission = Submission(profile=profile, game=self.game)
+        correct_ids = self.answer_key.correct_ids
+        chosen = []
+        new_options = collections.OrderedDict()
+        for slot in self.slots:
+            k = 's-%s' % slot.pk
+            option = self.cleaned_data[k]
+            if option is None:
+                continue
+            if not option.pk:
+                new_options[option.text] = option
+            chosen.append((slot, option))
+        with transaction.atomic():
+            if new_options:
+                bulk_create_options(self.game, new_options.values())
+                # The new options are not in the cached answer key.
+                self.game.bump_version()
+            slots = [SubmissionSlot(submission=submission,
+                                    slot=slot,
+                                    option=option,
+                                    feedback=get_feedback(
+                                        slot.key_id, option, correct_ids))
+                     for slot, option in chosen]
+            if self.game.packed:
+                layout = extend_layout(
+                    self.game, [slot.pk for slot in self.slots])
+                submission.packed_options = pack(
+                    {s.slot_id: s.option_id for s in slots}, layout)
+                submission.save()
+                add_usage(s.option_id for s in slots)
+            else:
+                submission.save()
+                for s in slots:
+                    s.submission = s.submission  # Update submission_id
+                SubmissionSlot.objects.bulk_create(slots)
+            record_submission(submission, [s.feedback for s in slots])
+        return submission, slots
+
 
 class GameAdminForm(forms.Form):
+    """Edit the mode and the slots of a game, and the options on one page
+    of its options. The options on other pages are looked up in the answer
+    key."""
+
     new_slots = DistinctLinesField(required=False)
     new_options = DistinctLinesField(required=False)
 
     def __init__(self, **kwargs):
         self.game = kwargs.pop('game')
+        self.answer_key = answer_key = kwargs.pop('answer_key')
+        # Options on the page with their alias targets loaded
+        options = kwargs.pop('options')
         super(GameAdminForm, self).__init__(**kwargs)
         if self.game.mode == Game.INITIAL:
             mode_choices = Game.MODES
@@ -72,7 +164,7 @@ class GameAdminForm(forms.Form):
             choices=mode_choices, initial=self.game.mode)
         self.slot_keys = collections.OrderedDict()
         self.option_keys = collections.OrderedDict()
-        for slot in self.game.slot_set.all():
+        for slot in answer_key.get_slots(self.game):
             k = 's-%s' % slot.pk
             # Slot position
             self.fields[k + '-p'] = forms.IntegerField(
@@ -82,17 +174,12 @@ class GameAdminForm(forms.Form):
                 initial=slot.stem)
             # Slot key
             key_initial = ''
-            if slot.key:
-                key_initial = slot.key.text
+            if slot.key_id is not None:
+                key_initial = answer_key.options_by_pk[slot.key_id].text
             self.fields[k + '-k'] = forms.CharField(
                 initial=key_initial, required=False)
             self.slot_keys[k] = slot
 
-        options = (
-            o
-            for kind in (Option.CANONICAL, Option.UNCONFIRMED, Option.ALIAS)
-            for o in self.game.option_set.filter(kind=kind))
-
         for option in options:
             k = 'o-%s' % option.pk
             # Option alias target
@@ -139,12 +226,21 @@ class GameAdminForm(forms.Form):
             self.add_error('new_slots', '%s findes allerede' % e)
         return self.cleaned_data['new_slots']
 
+    def get_other_option(self, text):
+        """Return the AnswerKeyOption with the text if it is not on the
+        page, or None."""
+        pk = self.answer_key.option_ids.get(text)
+        if pk is None or 'o-%s' % pk in self.option_keys:
+            return None
+        return self.answer_key.options_by_pk[pk]
+
     def clean_new_options(self):
         new_options = set(self.cleaned_data['new_options'])
-        existing_options = set(o.text for o in self.option_keys.values())
+        existing_options = set(self.answer_key.option_ids)
+        existing_options.update(o.text for o in self.option_keys.values())
         e = ', '.join('"%s"' % v for v in new_options & existing_options)
         if e:
-            self.add_error('new_options', '%s findes allerede' % e)
+            raise ValidationError('%s findes allerede' % e)
         return self.cleaned_data['new_options']
 
     def clean(self):
@@ -160,6 +256,7 @@ class GameAdminForm(forms.Form):
                 self.cleaned_data[k + '-p'] = i + 1
 
         has_all_options = all(k in self.cleaned_data for k in self.option_keys)
+        has_new_options = 'new_options' in self.cleaned_data
         if has_all_options:
             # Clean alias targets
             alias_targets = {o.text: self.cleaned_data[k]
@@ -167,34 +264,56 @@ class GameAdminForm(forms.Form):
 
             for k, v in alias_targets.items():
                 if v == '':
-                    pass
-                elif alias_targets.get(v, v) != v:
+                    continue
+                if v in alias_targets:
+                    canonical = alias_targets[v] == v
+                else:
+                    other = self.get_other_option(v)
+                    canonical = (other is None or
+                                 other.kind == Option.CANONICAL)
+                    if other is None and has_new_options:
+                        if v not in self.cleaned_data['new_options']:
+                            # Add target as new option
+                            self.cleaned_data['new_options'].append(v)
+                if not canonical:
                     self.add_error('new_options',
                                    '"%s" peger på "%s" ' % (k, v) +
                                    'som ikke peger på sig selv')
-                elif v not in alias_targets:
-                    if v not in self.cleaned_data['new_options']:
-                        # Add target as new option
-                        self.cleaned_data['new_options'].append(v)
+
+            # Aliases on other pages of options that are no longer
+            # canonical
+            changed = {o.pk: o.text for k, o in self.option_keys.items()
+                       if alias_targets[o.text] != o.text}
+            for o in self.answer_key.options if changed else ():
+                if (o.alias_target_id in changed and
+                        'o-%s' % o.pk not in self.option_keys):
+                    self.add_error('new_options',
+                                   '"%s" peger på "%s" ' %
+                                   (o.text, changed[o.alias_target_id]) +
+                                   'som ikke peger på sig selv')
 
         has_all_keys = all(k + '-k' in self.cleaned_data
                            for k in self.slot_keys)
+        # The alias targets may have added errors to new_options
         has_new_options = 'new_options' in self.cleaned_data
         if has_all_keys and has_all_options and has_new_options:
-            valid_options = (
-                self.cleaned_data['new_options'] +
-                [o.text for k, o in self.option_keys.items()
-                 if self.cleaned_data[k] == o.text])
-            invalid_options = [o.text for k, o in self.option_keys.items()
-                               if self.cleaned_data[k] != o.text]
             for k in self.slot_keys:
                 key = self.cleaned_data[k + '-k']
-                if key:
-                    if key in invalid_options:
-                        self.add_error(k + '-k',
-                                       '"%s" peger ikke på sig selv' % key)
-                    elif key not in valid_options:
-                        self.add_error(k + '-k',
-                                       '"%s" er ikke en svarmulighed' % key)
+                if not key:
+                    continue
+                if key in alias_targets:
+                    valid = canonical = alias_targets[key] == key
+                elif key in self.cleaned_data['new_options']:
+                    valid = canonical = True
+                else:
+                    other = self.get_other_option(key)
+                    valid = other is not None
+                    canonical = valid and other.kind == Option.CANONICAL
+                if not valid:
+                    self.add_error(k + '-k',
+                                   '"%s" er ikke en svarmulighed' % key)
+                elif not canonical:
+                    self.add_error(k + '-k',
+                                   '"%s" peger ikke på sig selv' % key)
 
         return self.cleaned_data
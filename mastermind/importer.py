@@ -0,0 +1,150 @@
+"""Import games with many slots, options and aliases from a file.
+
+A file is a sequence of records (kind, text, target), either as CSV rows
+or as JSON Lines objects with the keys "kind", "text" and "target":
+
+    slot,<stem>,<text of the key, or empty>
+    option,<text>,
+    alias,<text>,<text of the canonical option>
+
+Slots get positions in the order they appear. Targets may refer to
+options that appear later in the file.
+"""
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from mastermind.db import BATCH_SIZE, bulk_create_options
+from mastermind.models import Game, Option, Slot
+from mastermind.opengames import invalidate_open_games
+
+
+SLOT = 'slot'
+OPTION = 'option'
+ALIAS = 'alias'
+
+# Maximum lengths of Slot.stem and Option.text
+MAX_LENGTH = 200
+
+# Stop reporting errors after this many
+MAX_ERRORS = 20
+
+
+def read_csv(lines):
+    """Yield (line number, kind, text, target) from CSV lines."""
+    reader = csv.reader(lines)
+    for row in reader:
+        if not row:
+            continue
+        row += [''] * (3 - len(row))
+        yield reader.line_num, row[0].strip(), row[1].strip(), row[2].strip()
+
+
+def read_jsonl(lines):
+    """Yield (line number, kind, text, target) from JSON Lines."""
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            values = [record.get(k) or '' for k in ('kind', 'text', 'target')]
+        except (ValueError, AttributeError):
+            # Reported as an unknown kind by GameData.parse
+            values = ['', '', '']
+        kind, text, target = ['%s' % (v,) for v in values]
+        yield i + 1, kind, text.strip(), target.strip()
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+class GameData(object):
+    """The slots, options and aliases read from a file, checked for
+    duplicates and invalid targets."""
+
+    def __init__(self):
+        # (stem, key text) in order
+        self.slots = []
+        # Texts of canonical options
+        self.options = []
+        # (text, target text)
+        self.aliases = []
+
+    @classmethod
+    def parse(cls, records):
+        """Read and check the records in one pass, and raise
+        ValidationError with the errors of the first MAX_ERRORS lines
+        that have errors."""
+        data = cls()
+        errors = []
+        stems = set()
+        texts = set()
+        # The targets are checked when all options have been read
+        keys = []
+        targets = []
+        for line, kind, text, target in records:
+            names = {SLOT: stems, OPTION: texts, ALIAS: texts}.get(kind)
+            if names is None:
+                errors.append('Linje %s: Ukendt slags "%s"' % (line, kind))
+            elif not text:
+                errors.append('Linje %s: Tom tekst' % (line,))
+            elif len(text) > MAX_LENGTH or len(target) > MAX_LENGTH:
+                errors.append('Linje %s: Teksten er for lang' % (line,))
+            elif text in names:
+                errors.append('Linje %s: "%s" forekommer flere gange' %
+                              (line, text))
+            elif kind == ALIAS and not target:
+                errors.append('Linje %s: Alias uden mål' % (line,))
+            else:
+                names.add(text)
+                if kind == SLOT:
+                    data.slots.append((text, target))
+                    if target:
+                        keys.append((line, target))
+                elif kind == OPTION:
+                    data.options.append(text)
+                else:
+                    data.aliases.append((text, target))
+                    targets.append((line, target))
+            if len(errors) >= MAX_ERRORS:
+                break
+        canonical = set(data.options)
+        for line, target in sorted(keys + targets):
+            if len(errors) >= MAX_ERRORS:
+                break
+            if target not in canonical:
+                errors.append(
+                    'Linje %s: "%s" er ikke en kanonisk valgmulighed' %
+                    (line, target))
+        if errors:
+            raise ValidationError(errors)
+        return data
+
+    def save(self, owner, title, mode=Game.INITIAL, batch_size=BATCH_SIZE):
+        """Create the game with its options, aliases and slots in one
+        transaction, and return it."""
+        with transaction.atomic():
+            game = Game.objects.create(owner=owner, title=title, mode=mode)
+            option_ids = bulk_create_options(
+                game,
+                (Option(game=game, kind=Option.CANONICAL, text=text)
+                 for text in self.options),
+                batch_size=batch_size)
+            Option.objects.bulk_create(
+                (Option(game=game, kind=Option.ALIAS, text=text,
+                        alias_target_id=option_ids[target])
+                 for text, target in self.aliases),
+                batch_size=batch_size)
+            Slot.objects.bulk_create(
+                (Slot(game=game, position=i + 1, stem=stem,
+                      key_id=option_ids[key] if key else None)
+                 for i, (stem, key) in enumerate(self.slots)),
+                batch_size=batch_size)
+        if game.mode == Game.OPEN:
+            invalidate_open_games()
+        return game
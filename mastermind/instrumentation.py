@@ -0,0 +1,188 @@
+"""Per-request timers and counters.
+
+mastermind.middleware.InstrumentationMiddleware records the wall time,
+database queries, template render time and cache hits of every request
+into request.log_data, logs it as one JSON line on the
+'mastermind.requests' logger and adds it to the in-process histogram,
+which superusers can see on the Stats view.
+"""
+from __future__ import absolute_import, unicode_literals, division
+
+import bisect
+import threading
+import timeit
+
+from django.db.backends.utils import CursorWrapper
+
+
+# Upper bounds in milliseconds of the histogram buckets.
+# The last bucket has no upper bound.
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_local = threading.local()
+
+
+class RequestMetrics(object):
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.render_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def start_request():
+    metrics = _local.metrics = RequestMetrics()
+    return metrics
+
+
+def finish_request():
+    _local.metrics = None
+
+
+def current_request():
+    """Return the metrics of the request handled by this thread, if any."""
+    return getattr(_local, 'metrics', None)
+
+
+def record_cache(hit):
+    """Count a lookup in the cache in the metrics of the current request,
+    if any."""
+    metrics = current_request()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+class TimedCursorWrapper(CursorWrapper):
+    """Count the queries and their time in the metrics of the current
+    request. Wraps the cursor wrapper made by the connection."""
+
+    def timed(self, method, *args):
+        metrics = current_request()
+        if metrics is None:
+            return method(*args)
+        start = timeit.default_timer()
+        try:
+            return method(*args)
+        finally:
+            metrics.queries += 1
+            metrics.query_time += timeit.default_timer() - start
+
+    def callproc(self, procname, params=None):
+        return self.timed(self.cursor.callproc, procname, params)
+
+    def execute(self, sql, params=None):
+        return self.timed(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self.timed(self.cursor.executemany, sql, param_list)
+
+
+def instrument_connection(connection):
+    """Make the cursors of the connection count their queries. The
+    connection object is per thread, so this is done on the first request
+    handled by each thread."""
+    if getattr(connection, 'mastermind_instrumented', False):
+        return
+    make_cursor = connection.make_cursor
+    make_debug_cursor = connection.make_debug_cursor
+    connection.make_cursor = (
+        lambda cursor: TimedCursorWrapper(make_cursor(cursor), connection))
+    connection.make_debug_cursor = (
+        lambda cursor: TimedCursorWrapper(make_debug_cursor(cursor),
+                                          connection))
+    connection.mastermind_instrumented = True
+
+
+class ViewStats(object):
+    def __init__(self, view):
+        self.view = view
+        self.count = 0
+        self.time = 0.0
+        self.max_time = 0.0
+        self.queries = 0
+        self.query_time = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, time, queries, query_time):
+        self.count += 1
+        self.time += time
+        self.max_time = max(self.max_time, time)
+        self.queries += queries
+        self.query_time += query_time
+        self.buckets[bisect.bisect_left(BUCKETS, time * 1000)] += 1
+
+    def copy(self):
+        result = ViewStats(self.view)
+        result.__dict__.update(self.__dict__)
+        result.buckets = list(self.buckets)
+        return result
+
+    @property
+    def mean_ms(self):
+        return self.time * 1000 / self.count
+
+    @property
+    def max_ms(self):
+        return self.max_time * 1000
+
+    @property
+    def mean_queries(self):
+        return self.queries / self.count
+
+    @property
+    def mean_query_ms(self):
+        return self.query_time * 1000 / self.count
+
+    def percentile_bound(self, p):
+        """Upper bound in milliseconds of the bucket containing the p'th
+        percentile, or None if it is in the last bucket."""
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+
+    @property
+    def p50_ms(self):
+        return self.percentile_bound(50)
+
+    @property
+    def p90_ms(self):
+        return self.percentile_bound(90)
+
+    @property
+    def p99_ms(self):
+        return self.percentile_bound(99)
+
+
+class Histogram(object):
+    """Response times per view since the process started."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def add(self, view, time, queries, query_time):
+        with self.lock:
+            try:
+                stats = self.views[view]
+            except KeyError:
+                stats = self.views[view] = ViewStats(view)
+            stats.add(time, queries, query_time)
+
+    def snapshot(self):
+        with self.lock:
+            return [self.views[k].copy() for k in sorted(self.views)]
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+
+histogram = Histogram()
@@ -0,0 +1,76 @@
+import csv
+import json
+import random
+import tempfile
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from mastermind.importer import READERS, GameData
+
+
+def write_records(fp, fmt, slots, options, aliases, seed=0):
+    rng = random.Random(seed)
+    records = [('option', 'option %d' % i, '') for i in range(options)]
+    records += [('alias', 'alias %d' % i, 'option %d' % rng.randrange(options))
+                for i in range(aliases)]
+    records += [('slot', 'slot %d' % i, 'option %d' % rng.randrange(options))
+                for i in range(slots)]
+    rng.shuffle(records)
+    if fmt == 'csv':
+        csv.writer(fp).writerows(records)
+    else:
+        for kind, text, target in records:
+            fp.write(json.dumps(dict(kind=kind, text=text, target=target)))
+            fp.write('\n')
+
+
+class Command(BaseCommand):
+    help = ('Measure the throughput of importing a generated game file in a '
+            'test database. Prints one JSON object.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(READERS),
+                            default='csv')
+        parser.add_argument('--slots', type=int, default=100)
+        parser.add_argument('--options', type=int, default=20000)
+        parser.add_argument('--aliases', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['options'] < 1:
+            raise CommandError('--options must be positive')
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            result = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.stdout.write(json.dumps(result, sort_keys=True))
+
+    def run(self, options):
+        fmt = options['format']
+        with tempfile.TemporaryFile('w+', encoding='utf-8', newline='') as fp:
+            write_records(fp, fmt, options['slots'], options['options'],
+                          options['aliases'])
+            fp.seek(0)
+            start = timeit.default_timer()
+            data = GameData.parse(READERS[fmt](fp))
+            parsed = timeit.default_timer()
+        data.save(None, 'Import benchmark', options['batch_size'])
+        saved = timeit.default_timer()
+        records = options['slots'] + options['options'] + options['aliases']
+        return {
+            'format': fmt,
+            'slots': options['slots'],
+            'options': options['options'],
+            'aliases': options['aliases'],
+            'batch_size': options['batch_size'],
+            'parse_s': round(parsed - start, 3),
+            'save_s': round(saved - parsed, 3),
+            'records_per_s': round(records / (saved - start)),
+        }
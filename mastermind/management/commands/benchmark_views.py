@@ -0,0 +1,133 @@
+import json
+import timeit
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment,
+)
+
+from mastermind.models import Profile
+from mastermind.packing import pack_game
+from mastermind.synthetic import (
+    SCALES, admin_post_data, client_for, create_game, create_submissions,
+)
+
+
+class Command(BaseCommand):
+    help = ('Measure queries, wall time and memory of every view on '
+            'synthetic games in a test database. Prints one JSON object '
+            'per view and scale.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', action='append', choices=SCALES,
+                            help='Scale to run (default: all)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Measured requests per view')
+        parser.add_argument('--label', default='',
+                            help='Label included in every result, '
+                            'e.g. a commit hash')
+        parser.add_argument('--packed', action='store_true',
+                            help='Pack the submissions of the games')
+
+    def handle(self, *args, **options):
+        scales = options['scale'] or sorted(
+            SCALES, key=lambda k: SCALES[k]['options'])
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be positive')
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            for scale in scales:
+                self.run_scale(scale, options['repeat'], options['label'],
+                               options['packed'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run_scale(self, scale, repeat, label, packed):
+        params = SCALES[scale]
+        cache.clear()
+        owner = Profile.objects.create(name='Owner')
+        game = create_game(
+            owner=owner, slots=params['slots'], options=params['options'],
+            aliases=params['aliases'], unconfirmed=params['unconfirmed'],
+            title='Benchmark %s' % scale)
+        create_submissions(game, profiles=params['profiles'],
+                           submissions=params['submissions'])
+        if packed:
+            pack_game(game)
+        player = Profile.objects.exclude(pk=owner.pk).first()
+        owner_client = client_for(owner)
+        player_client = client_for(player)
+        anonymous_client = Client()
+
+        slots = list(game.slot_set.order_by('position'))
+        texts = list(game.option_set.values_list('text', flat=True))
+        guess = {'s-%s' % s.pk: texts[i % len(texts)]
+                 for i, s in enumerate(slots)}
+        admin_data = admin_post_data(game)
+        game_data = {
+            'title': 'New game',
+            'slots': '\n'.join('slot %d' % i
+                               for i in range(params['slots'])),
+            'options': '\n'.join('option %d' % i
+                                 for i in range(params['options'])),
+        }
+
+        views = [
+            ('home_anonymous', anonymous_client, 'get', '/', None),
+            ('home_player', player_client, 'get', '/', None),
+            ('home_owner', owner_client, 'get', '/', None),
+            ('game_create', owner_client, 'post', '/game/new/', game_data),
+            ('game_submission_get', player_client, 'get',
+             '/game/%s/' % game.pk, None),
+            ('game_submission_post', player_client, 'post',
+             '/game/%s/' % game.pk, guess),
+            ('game_admin_get', owner_client, 'get',
+             '/game/%s/admin/' % game.pk, None),
+            ('game_admin_post', owner_client, 'post',
+             '/game/%s/admin/' % game.pk, admin_data),
+            ('game_unconfirmed_options_get', owner_client, 'get',
+             '/game/%s/admin/unconfirmed/' % game.pk, None),
+            ('game_leaderboard_get', owner_client, 'get',
+             '/game/%s/admin/leaderboard/' % game.pk, None),
+        ]
+        for name, client, method, path, data in views:
+            result = self.measure(client, method, path, data, repeat)
+            result.update(view=name, scale=scale, label=label,
+                          packed=packed, **params)
+            self.stdout.write(json.dumps(result, sort_keys=True))
+
+    def measure(self, client, method, path, data, repeat):
+        request = getattr(client, method)
+        args = (path,) if data is None else (path, data)
+        times = []
+        queries = []
+        peaks = []
+        # The first request warms up caches and is reported separately.
+        for i in range(repeat + 1):
+            tracemalloc.start()
+            with CaptureQueriesContext(connection) as context:
+                start = timeit.default_timer()
+                response = request(*args)
+                elapsed = timeit.default_timer() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            times.append(elapsed)
+            queries.append(len(context.captured_queries))
+            peaks.append(peak)
+        warm_times = sorted(times[1:])
+        return {
+            'status': response.status_code,
+            'cold_queries': queries[0],
+            'cold_ms': round(times[0] * 1000, 3),
+            'queries': max(queries[1:]),
+            'median_ms': round(warm_times[len(warm_times) // 2] * 1000, 3),
+            'min_ms': round(warm_times[0] * 1000, 3),
+            'peak_memory_kib': round(max(peaks[1:]) / 1024, 1),
+        }
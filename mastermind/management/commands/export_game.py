@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mastermind.export import FORMATS
+from mastermind.models import Game
+
+
+class Command(BaseCommand):
+    help = ('Print every answer of every submission in a game with its '
+            'canonical option and feedback.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('game', type=int, help='Id of the game')
+        parser.add_argument('--format', choices=sorted(FORMATS),
+                            default='csv', help='Output format')
+
+    def handle(self, *args, **options):
+        try:
+            game = Game.objects.get(pk=options['game'])
+        except Game.DoesNotExist:
+            raise CommandError('Game %s does not exist' % options['game'])
+        iter_lines, content_type = FORMATS[options['format']]
+        for line in iter_lines(game):
+            self.stdout.write(line, ending='')
@@ -0,0 +1,59 @@
+import io
+import os
+import timeit
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from mastermind.importer import READERS, GameData
+from mastermind.models import Game, Profile
+
+
+class Command(BaseCommand):
+    help = ('Create a game from a CSV or JSON Lines file of slots, options '
+            'and aliases. See mastermind.importer for the format.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--title', required=True,
+                            help='Title of the new game')
+        parser.add_argument('--format', choices=sorted(READERS),
+                            help='Format of the file '
+                            '(default: from the file extension)')
+        parser.add_argument('--owner', type=int,
+                            help='Id of the profile that owns the game')
+        parser.add_argument('--mode', choices=[k for k, v in Game.MODES],
+                            default=Game.INITIAL,
+                            help='Mode of the new game (default: initial)')
+
+    def handle(self, *args, **options):
+        fmt = options['format']
+        if fmt is None:
+            fmt = os.path.splitext(options['path'])[1].lstrip('.').lower()
+            if fmt not in READERS:
+                raise CommandError('Unknown file extension; use --format')
+        owner = None
+        if options['owner'] is not None:
+            try:
+                owner = Profile.objects.get(pk=options['owner'])
+            except Profile.DoesNotExist:
+                raise CommandError(
+                    'Profile %s does not exist' % options['owner'])
+
+        start = timeit.default_timer()
+        with io.open(options['path'], encoding='utf-8-sig', newline='') as fp:
+            try:
+                data = GameData.parse(READERS[fmt](fp))
+            except ValidationError as exn:
+                raise CommandError('\n'.join(exn.messages))
+        parsed = timeit.default_timer()
+        game = data.save(owner, options['title'], mode=options['mode'])
+        saved = timeit.default_timer()
+
+        records = len(data.slots) + len(data.options) + len(data.aliases)
+        self.stdout.write(
+            'Created game %s with %s slots, %s options and %s aliases '
+            'in %.2f s (parse %.2f s, save %.2f s, %d records/s)' %
+            (game.pk, len(data.slots), len(data.options), len(data.aliases),
+             saved - start, parsed - start, saved - parsed,
+             records / (saved - start)))
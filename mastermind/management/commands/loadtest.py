@@ -0,0 +1,140 @@
+import json
+import random
+import threading
+import timeit
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from mastermind.models import Submission
+from mastermind.synthetic import SCALES, create_game
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return None
+    k = max(0, min(len(values) - 1, int(round(p / 100.0 * len(values))) - 1))
+    return values[k]
+
+
+class Player(threading.Thread):
+    """Simulate one player who opens the game page and submits guesses.
+
+    The first guess creates the player's profile through the session
+    path of mastermind.middleware, like a new visitor's would.
+    """
+
+    def __init__(self, game, texts, guesses, barrier, seed):
+        super(Player, self).__init__()
+        self.path = '/game/%s/' % game.pk
+        self.slot_keys = ['s-%s' % pk for pk in
+                          game.slot_set.values_list('pk', flat=True)]
+        self.texts = texts
+        self.guesses = guesses
+        self.barrier = barrier
+        self.rng = random.Random(seed)
+        # (kind, seconds, status or exception name)
+        self.results = []
+
+    def request(self, kind, method, *args):
+        start = timeit.default_timer()
+        try:
+            status = method(self.path, *args).status_code
+        except Exception as exn:
+            status = type(exn).__name__
+        self.results.append((kind, timeit.default_timer() - start, status))
+
+    def run(self):
+        client = Client()
+        try:
+            self.barrier.wait()
+            for i in range(self.guesses):
+                self.request('get', client.get)
+                guess = {k: self.rng.choice(self.texts)
+                         for k in self.slot_keys}
+                self.request('post', client.post, guess)
+        finally:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Simulate concurrent players guessing in a synthetic game in a '
+            'test database and report throughput and latency percentiles '
+            'as JSON. The default in-memory SQLite test database locks '
+            'under concurrent writes; set the TEST NAME of the database to '
+            'a file to run against a file-backed SQLite database, or use a '
+            'local PostgreSQL server.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='medium',
+                            help='Size of the game (default: medium)')
+        parser.add_argument('--players', type=int, default=20,
+                            help='Number of concurrent players')
+        parser.add_argument('--guesses', type=int, default=10,
+                            help='Guesses submitted by each player')
+        parser.add_argument('--typos', type=float, default=0.1,
+                            help='Fraction of answers that are not options')
+
+    def handle(self, *args, **options):
+        if options['players'] < 1 or options['guesses'] < 1:
+            raise CommandError('--players and --guesses must be positive')
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            result = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.stdout.write(json.dumps(result, sort_keys=True))
+
+    def run(self, options):
+        params = SCALES[options['scale']]
+        cache.clear()
+        game = create_game(
+            slots=params['slots'], options=params['options'],
+            aliases=params['aliases'], unconfirmed=params['unconfirmed'],
+            title='Load test')
+        texts = list(game.option_set.values_list('text', flat=True))
+        typos = int(len(texts) * options['typos'])
+        texts += ['typo %d' % i for i in range(typos)]
+
+        players = options['players']
+        barrier = threading.Barrier(players + 1)
+        threads = [Player(game, texts, options['guesses'], barrier, seed=i)
+                   for i in range(players)]
+        for t in threads:
+            t.start()
+        barrier.wait()
+        start = timeit.default_timer()
+        for t in threads:
+            t.join()
+        duration = timeit.default_timer() - start
+
+        results = [r for t in threads for r in t.results]
+        report = {
+            'scale': options['scale'],
+            'players': players,
+            'guesses': options['guesses'],
+            'duration_s': round(duration, 3),
+            'requests': len(results),
+            'requests_per_s': round(len(results) / duration, 1),
+            'submissions': Submission.objects.filter(game=game).count(),
+        }
+        for kind in ('get', 'post'):
+            times = sorted(s for k, s, status in results if k == kind)
+            errors = [status for k, s, status in results
+                      if k == kind and status not in (200, 302)]
+            report[kind] = {
+                'count': len(times),
+                'errors': len(errors),
+                'error_kinds': sorted(set(str(e) for e in errors)),
+            }
+            for p in (50, 90, 99, 100):
+                report[kind]['p%s_ms' % p] = round(
+                    percentile(times, p) * 1000, 3)
+        return report
@@ -0,0 +1,42 @@
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mastermind.db import BATCH_SIZE
+from mastermind.models import Game, Submission, SubmissionSlot
+from mastermind.packing import pack_game, unpack_game
+
+
+class Command(BaseCommand):
+    help = ('Store the answers of the submissions in a game packed in one '
+            'column per submission instead of as SubmissionSlot rows, '
+            'or back again with --unpack.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('game', type=int, help='Id of the game')
+        parser.add_argument('--unpack', action='store_true',
+                            help='Convert packed submissions back to '
+                            'SubmissionSlot rows')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Submissions converted per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            game = Game.objects.get(pk=options['game'])
+        except Game.DoesNotExist:
+            raise CommandError('Game %s does not exist' % options['game'])
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        start = timeit.default_timer()
+        if options['unpack']:
+            count = unpack_game(game, batch_size=options['batch_size'])
+        else:
+            count = pack_game(game, batch_size=options['batch_size'])
+        elapsed = timeit.default_timer() - start
+        rows = SubmissionSlot.objects.filter(submission__game=game).count()
+        packed = Submission.objects.filter(game=game)
+        packed = packed.exclude(packed_options=None).count()
+        self.stdout.write(
+            'Converted %s submissions in %.2f s. The game now has %s packed '
+            'submissions and %s SubmissionSlot rows.' %
+            (count, elapsed, packed, rows))
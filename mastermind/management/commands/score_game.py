@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mastermind.models import Game, Submission, SubmissionSlot
+from mastermind.packing import get_scores
+
+
+class Command(BaseCommand):
+    help = 'Print the feedback counts of every submission in a game.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('game', type=int, help='Id of the game')
+
+    def handle(self, *args, **options):
+        try:
+            game = Game.objects.get(pk=options['game'])
+        except Game.DoesNotExist:
+            raise CommandError('Game %s does not exist' % options['game'])
+        scores = get_scores(game)
+        feedbacks = [k for k, v in SubmissionSlot.FEEDBACKS]
+        self.stdout.write('\t'.join(
+            ['submission', 'profile', 'created_time'] + feedbacks))
+        qs = Submission.objects.filter(game=game).values_list(
+            'pk', 'profile_id', 'created_time')
+        for pk, profile_id, created_time in qs.iterator():
+            score = scores.get(pk, {})
+            row = [pk, profile_id, created_time.isoformat()]
+            row += [score.get(k, 0) for k in feedbacks]
+            self.stdout.write('\t'.join(str(v) for v in row))
@@ -0,0 +1,102 @@
+from __future__ import division
+
+import array
+import collections
+import math
+
+from django.core.cache import cache
+
+from mastermind.answerkey import normalize_text
+from mastermind.instrumentation import record_cache
+
+
+# Suggestions less similar than this are not shown
+MIN_SIMILARITY = 0.5
+
+
+def trigrams(normalized):
+    padded = '  %s ' % normalized
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class MatchIndex(object):
+    """Trigram index of the confirmed options of a game, used to suggest
+    the canonical option that an unconfirmed option was meant to be.
+
+    Similarity is the Dice coefficient of the trigram sets of the
+    normalized texts. The number of trigrams each entry shares with a
+    text is counted from the posting lists of the text's trigrams, and
+    only entries that share enough trigrams to reach min_similarity are
+    compared.
+
+    Building the index for a large game takes much longer than the
+    suggestions for a page, so get_match_index caches it.
+    """
+
+    def __init__(self, entries, min_similarity=MIN_SIMILARITY):
+        # entries is an iterable of (normalized text, canonical id)
+        self.min_similarity = min_similarity
+        self.canonical_ids = []
+        sizes = []
+        postings = collections.defaultdict(list)
+        for i, (normalized, canonical_id) in enumerate(entries):
+            grams = trigrams(normalized)
+            self.canonical_ids.append(canonical_id)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(i)
+        # Arrays instead of a set of trigrams per entry, so the index is
+        # small and fast to pickle.
+        self.sizes = array.array('i', sizes)
+        self.postings = {gram: array.array('i', posting)
+                         for gram, posting in postings.items()}
+
+    @classmethod
+    def for_answer_key(cls, answer_key):
+        return cls(sorted(answer_key.normalized_ids.items()))
+
+    def match(self, text):
+        """Return the canonical id of the entry most similar to the text,
+        or None if no entry is similar enough."""
+        grams = trigrams(normalize_text(text))
+        t = self.min_similarity
+        # Dice >= t implies that at least this many trigrams are shared.
+        # Round down slightly to avoid rounding errors.
+        shared = int(math.ceil(t * len(grams) / (2 - t) - 1e-9))
+        # Number of trigrams each entry shares with the text
+        counts = collections.Counter()
+        for g in grams:
+            counts.update(self.postings.get(g, ()))
+        # Ties go to the entry that comes first
+        best = None
+        for i, n in counts.items():
+            if n < shared:
+                continue
+            similarity = 2 * n / (len(grams) + self.sizes[i])
+            if similarity >= t and (best is None or (similarity, -i) > best):
+                best = similarity, -i
+        if best is not None:
+            return self.canonical_ids[-best[1]]
+
+    def suggest(self, texts):
+        """Return a dict mapping each of the texts to the id of its most
+        similar canonical option, leaving out texts without a match."""
+        result = {}
+        for text in texts:
+            canonical_id = self.match(text)
+            if canonical_id is not None:
+                result[text] = canonical_id
+        return result
+
+
+def get_match_index(game, answer_key):
+    """Return the MatchIndex of the answer key of the game, cached under
+    the game version like the answer key."""
+    # Change the prefix when the attributes of MatchIndex change.
+    cache_key = 'mastermind-match-index-1-%s-%s' % (game.pk, game.version)
+    index = cache.get(cache_key)
+    record_cache(index is not None)
+    if index is None:
+        index = MatchIndex.for_answer_key(answer_key)
+        cache.set(cache_key, index)
+    return index
@@ -1,46 +1,117 @@
 from __future__ import absolute_import, unicode_literals, division
 
 import functools
+import json
+import logging
+import timeit
 
+from django.db import connection
 from django.utils.functional import SimpleLazyObject
 
 from ipware.ip import get_real_ip
 
+from mastermind import instrumentation
 from mastermind.models import Profile
 
 
+logger = logging.getLogger('mastermind.requests')
+
+
+PROFILE_KEY = 'mastermind_profile_id'
+PROFILE_USER_KEY = 'mastermind_profile_user_id'
+
+
+def remember_profile(request, profile):
+    request.session[PROFILE_KEY] = profile.pk
+    request.session[PROFILE_USER_KEY] = profile.user_id
+
+
+def forget_profile(request):
+    request.session.pop(PROFILE_KEY, None)
+    request.session.pop(PROFILE_USER_KEY, None)
+
+
 def get_profile(request):
-    KEY = 'mastermind_profile_id'
     u = request.user if request.user.is_authenticated() else None
+    user_id = u.pk if u else None
 
-    if KEY in request.session:
+    if (PROFILE_KEY in request.session and
+            PROFILE_USER_KEY in request.session and
+            request.session[PROFILE_USER_KEY] == user_id):
+        # The session was already validated against the database;
+        # the remaining fields are loaded on first access. The profile
+        # may have been deleted since, so get_or_create_profile checks
+        # that it exists before anything refers to it.
+        p = Profile.from_db(
+            None, ['id', 'user_id'],
+            [int(request.session[PROFILE_KEY]), user_id])
+        if u:
+            p.user = u
+        request.profile_unchecked = True
+        return p
+
+    if PROFILE_KEY in request.session:
         try:
-            return Profile.objects.get(
-                pk=int(request.session[KEY]),
+            p = Profile.objects.get(
+                pk=int(request.session[PROFILE_KEY]),
                 user=u)
         except Profile.DoesNotExist:
             pass
+        else:
+            remember_profile(request, p)
+            return p
 
     if u:
         try:
-            return Profile.objects.get(user=u)
+            p = Profile.objects.get(user=u)
         except Profile.DoesNotExist:
             pass
+        else:
+            remember_profile(request, p)
+            return p
 
 
 def get_or_create_profile(request):
-    KEY = 'mastermind_profile_id'
     if request.profile:
-        return request.profile
+        if not getattr(request, 'profile_unchecked', False):
+            return request.profile
+        request.profile_unchecked = False
+        if Profile.objects.filter(pk=request.profile.pk).exists():
+            return request.profile
+        forget_profile(request)
     p = Profile()
     if request.user.is_authenticated():
         p.user = request.user
     p.save()
     request.profile = p
-    request.session[KEY] = p.pk
+    remember_profile(request, p)
     return p
 
 
+class LogData(dict):
+    """Data about a request for logging. The entries given as functions
+    in lazy are computed when first read, and are not in the dict until
+    then."""
+
+    def __init__(self, lazy):
+        super(LogData, self).__init__()
+        self.lazy = lazy
+
+    def __missing__(self, key):
+        try:
+            func = self.lazy.pop(key)
+        except KeyError:
+            raise KeyError(key)
+        value = self[key] = func()
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
 class Middleware(object):
     def __init__(self, get_response):
         self.get_response = get_response
@@ -50,5 +121,57 @@ class Middleware(object):
             get_profile, request))
         request.get_or_create_profile = functools.partial(
             get_or_create_profile, request)
-        request.log_data = {'ip': get_real_ip(request)}
+        request.log_data = LogData(
+            {'ip': functools.partial(get_real_ip, request)})
         return self.get_response(request)
+
+
+class InstrumentationMiddleware(object):
+    """Record timers and counters of each request in request.log_data.
+
+    Must come after Middleware, which sets request.log_data.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        instrumentation.instrument_connection(connection)
+        metrics = instrumentation.start_request()
+        start = timeit.default_timer()
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = timeit.default_timer() - start
+            instrumentation.finish_request()
+
+        match = request.resolver_match
+        view = match.view_name if match else None
+        request.log_data.update(
+            view=view,
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            time_ms=round(elapsed * 1000, 3),
+            render_ms=round(metrics.render_time * 1000, 3),
+            queries=metrics.queries,
+            query_ms=round(metrics.query_time * 1000, 3),
+            cache_hits=metrics.cache_hits,
+            cache_misses=metrics.cache_misses,
+        )
+        # The IP is only logged if something read it, so that get_real_ip
+        # does not run on every request.
+        logger.info(json.dumps(request.log_data, sort_keys=True))
+        instrumentation.histogram.add(
+            view or '-', elapsed, metrics.queries, metrics.query_time)
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = instrumentation.current_request()
+        start = timeit.default_timer()
+
+        def rendered(response):
+            metrics.render_time += timeit.default_timer() - start
+
+        response.add_post_render_callback(rendered)
+        return response
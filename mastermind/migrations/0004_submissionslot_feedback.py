@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.8 on 2026-10-18 03:32
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def compute_feedback(apps, schema_editor):
+    Game = apps.get_model('mastermind', 'Game')
+    Option = apps.get_model('mastermind', 'Option')
+    Slot = apps.get_model('mastermind', 'Slot')
+    SubmissionSlot = apps.get_model('mastermind', 'SubmissionSlot')
+    for game in Game.objects.all():
+        keys = dict(Slot.objects.filter(game=game).values_list('pk', 'key_id'))
+        correct_ids = set(k for k in keys.values() if k is not None)
+        options = {
+            pk: (kind, alias_target_id)
+            for pk, kind, alias_target_id in Option.objects.filter(
+                game=game).values_list('pk', 'kind', 'alias_target_id')}
+        changed = {}
+        qs = SubmissionSlot.objects.filter(submission__game=game)
+        for pk, slot_id, option_id in qs.values_list(
+                'pk', 'slot_id', 'option_id'):
+            kind, alias_target_id = options[option_id]
+            if kind == 'alias':
+                option_id = alias_target_id
+            key_id = keys[slot_id]
+            if kind == 'unconfirmed' or key_id is None:
+                feedback = 'unknown'
+            elif key_id == option_id:
+                feedback = 'correct'
+            elif option_id in correct_ids:
+                feedback = 'other'
+            else:
+                feedback = 'wrong'
+            changed.setdefault(feedback, []).append(pk)
+        for feedback, pks in changed.items():
+            for i in range(0, len(pks), 500):
+                SubmissionSlot.objects.filter(
+                    pk__in=pks[i:i + 500]).update(feedback=feedback)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mastermind', '0003_alter_submission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submissionslot',
+            name='feedback',
+            field=models.CharField(choices=[('correct', '●'), ('other', '○'), ('wrong', '✘'), ('unknown', '?')], default='unknown', max_length=20),
+        ),
+        migrations.RunPython(compute_feedback, migrations.RunPython.noop),
+    ]
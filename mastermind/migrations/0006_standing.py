@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.8 on 2026-10-18 03:41
+from __future__ import unicode_literals
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def compute_standings(apps, schema_editor):
+    Standing = apps.get_model('mastermind', 'Standing')
+    Submission = apps.get_model('mastermind', 'Submission')
+    SubmissionSlot = apps.get_model('mastermind', 'SubmissionSlot')
+    scores = {}
+    qs = SubmissionSlot.objects.filter(feedback__in=['correct', 'other'])
+    for submission_id, feedback in qs.values_list(
+            'submission_id', 'feedback'):
+        score = scores.setdefault(submission_id, [0, 0])
+        score[0 if feedback == 'correct' else 1] += 1
+    standings = {}
+    qs = Submission.objects.order_by('created_time')
+    for pk, game_id, profile_id in qs.values_list(
+            'pk', 'game_id', 'profile_id'):
+        key = tuple(scores.get(pk, (0, 0)))
+        try:
+            standing = standings[game_id, profile_id]
+        except KeyError:
+            standing = standings[game_id, profile_id] = Standing(
+                game_id=game_id, profile_id=profile_id)
+        standing.submission_count += 1
+        if (standing.best_submission_id is None or
+                key > (standing.best_correct, standing.best_other)):
+            standing.best_submission_id = pk
+            standing.best_correct, standing.best_other = key
+    Standing.objects.bulk_create(standings.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mastermind', '0005_game_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submission_count', models.PositiveIntegerField(default=0)),
+                ('best_correct', models.PositiveIntegerField(default=0)),
+                ('best_other', models.PositiveIntegerField(default=0)),
+                ('best_submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='mastermind.Submission')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='mastermind.Game')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='mastermind.Profile')),
+            ],
+            options={
+                'verbose_name': 'stilling',
+                'verbose_name_plural': 'stillinger',
+                'ordering': ['game', '-best_correct', '-best_other', 'submission_count'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='standing',
+            unique_together=set([('game', 'profile')]),
+        ),
+        migrations.RunPython(compute_standings, migrations.RunPython.noop),
+    ]
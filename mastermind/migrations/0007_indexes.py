@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.8 on 2026-10-18 03:45
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mastermind', '0006_standing'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='game',
+            index_together=set([('mode', 'title')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='option',
+            index_together=set([('game', 'kind', 'text')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='slot',
+            index_together=set([('game', 'position')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='submission',
+            index_together=set([('game', 'profile', 'created_time')]),
+        ),
+    ]
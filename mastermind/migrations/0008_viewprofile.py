@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.8 on 2026-10-18 03:48
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mastermind', '0007_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view', models.CharField(max_length=200)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=2000)),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('duration', models.FloatField(verbose_name='varighed (s)')),
+                ('summary', models.TextField(blank=True, verbose_name='oversigt')),
+                ('stats', models.BinaryField()),
+                ('game', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='mastermind.Game')),
+            ],
+            options={
+                'verbose_name': 'profilering',
+                'verbose_name_plural': 'profileringer',
+                'ordering': ['-created_time'],
+            },
+        ),
+    ]
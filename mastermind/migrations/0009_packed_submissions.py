@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.8 on 2026-10-18 04:02
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mastermind', '0008_viewprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='packed',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='packed_slots',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='packed_options',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.8 on 2026-10-18 04:14
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mastermind', '0009_packed_submissions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='game',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
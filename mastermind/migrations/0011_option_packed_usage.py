@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.8 on 2026-10-18 04:17
+from __future__ import unicode_literals
+
+import collections
+
+from django.db import migrations, models
+
+
+def count_packed_usage(apps, schema_editor):
+    Option = apps.get_model('mastermind', 'Option')
+    Submission = apps.get_model('mastermind', 'Submission')
+    counts = collections.Counter()
+    qs = Submission.objects.exclude(packed_options=None)
+    for packed in qs.values_list('packed_options', flat=True):
+        counts.update(int(pk) for pk in packed.split(',') if pk)
+    for pk, count in counts.items():
+        Option.objects.filter(pk=pk).update(packed_usage=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mastermind', '0010_game_version_not_editable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='option',
+            name='packed_usage',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_packed_usage, migrations.RunPython.noop),
+    ]
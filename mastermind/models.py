@@ -33,14 +33,26 @@ class Game(models.Model):
         Profile, on_delete=models.SET_NULL, blank=True, null=True)
     created_time = models.DateTimeField(auto_now_add=True)
     title = models.CharField(max_length=100)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    # Store the answers of new submissions packed, see mastermind.packing
+    packed = models.BooleanField(default=False, editable=False)
+    # Comma-separated slot ids that the packed answers refer to
+    packed_slots = models.TextField(blank=True, editable=False)
 
     def __str__(self):
         return '%s' % (self.title,)
 
+    def bump_version(self):
+        """Invalidate cached data derived from the slots and options."""
+        Game.objects.filter(pk=self.pk).update(
+            version=models.F('version') + 1)
+        self.version += 1
+
     class Meta:
         verbose_name = 'spil'
         verbose_name_plural = verbose_name
         ordering = ['title']
+        index_together = [('mode', 'title')]
 
 
 class Option(models.Model):
@@ -59,6 +71,9 @@ class Option(models.Model):
     alias_target = models.ForeignKey(
         'self', on_delete=models.CASCADE, blank=True, null=True)
     text = models.CharField(max_length=200, verbose_name='navn')
+    # Number of answers in packed submissions that chose the option,
+    # see mastermind.packing
+    packed_usage = models.PositiveIntegerField(default=0, editable=False)
 
     @property
     def is_alias(self):
@@ -89,10 +104,11 @@ class Option(models.Model):
         if self.is_unconfirmed:
             return '%s?' % (self.text,)
         elif self.is_alias:
-            if self.alias_target:
+            # Only print the target if it is already loaded.
+            if hasattr(self, Option.alias_target.cache_name):
                 return '%s -> %s' % (self.text, self.alias_target.text)
             else:
-                return '%s -> %s' % (self.text, self.alias_target)
+                return '%s -> #%s' % (self.text, self.alias_target_id)
         else:
             return '%s' % (self.text,)
 
@@ -101,6 +117,7 @@ class Option(models.Model):
         verbose_name_plural = verbose_name + 'er'
         ordering = ['game', 'text']
         unique_together = [('game', 'text')]
+        index_together = [('game', 'kind', 'text')]
 
 
 class Slot(models.Model):
@@ -121,12 +138,16 @@ class Slot(models.Model):
         verbose_name = 'indgang'
         verbose_name_plural = verbose_name + 'e'
         ordering = ['game', 'position']
+        index_together = [('game', 'position')]
 
 
 class Submission(models.Model):
     game = models.ForeignKey(Game, on_delete=models.CASCADE)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
     created_time = models.DateTimeField(auto_now_add=True)
+    # Comma-separated option ids if the answers are packed instead of
+    # stored as SubmissionSlots, see mastermind.packing
+    packed_options = models.TextField(null=True, blank=True, editable=False)
 
     def __str__(self):
         fields = (self.game, self.profile, self.created_time)
@@ -137,12 +158,26 @@ class Submission(models.Model):
         verbose_name_plural = verbose_name
         ordering = ['game', 'profile', 'created_time']
         get_latest_by = 'created_time'
+        index_together = [('game', 'profile', 'created_time')]
 
 
 class SubmissionSlot(models.Model):
+    CORRECT = 'correct'
+    OTHER = 'other'
+    WRONG = 'wrong'
+    UNKNOWN = 'unknown'
+    FEEDBACKS = (
+        (CORRECT, '\N{BLACK CIRCLE}'),
+        (OTHER, '\N{WHITE CIRCLE}'),
+        (WRONG, '\N{HEAVY BALLOT X}'),
+        (UNKNOWN, '?'),
+    )
+
     submission = models.ForeignKey(Submission, on_delete=models.CASCADE)
     slot = models.ForeignKey(Slot, on_delete=models.CASCADE)
     option = models.ForeignKey(Option, on_delete=models.CASCADE)
+    feedback = models.CharField(
+        max_length=20, choices=FEEDBACKS, default=UNKNOWN)
 
     def clean(self):
         if self.slot.game != self.submission.game:
@@ -157,3 +192,46 @@ class SubmissionSlot(models.Model):
         verbose_name_plural = verbose_name + 'e'
         ordering = ['submission', 'slot']
         unique_together = [('submission', 'slot')]
+
+
+class Standing(models.Model):
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
+    submission_count = models.PositiveIntegerField(default=0)
+    best_submission = models.ForeignKey(
+        Submission, on_delete=models.SET_NULL, blank=True, null=True)
+    best_correct = models.PositiveIntegerField(default=0)
+    best_other = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return '%s: %s' % (self.game, self.profile)
+
+    class Meta:
+        verbose_name = 'stilling'
+        verbose_name_plural = verbose_name + 'er'
+        ordering = ['game', '-best_correct', '-best_other',
+                    'submission_count']
+        unique_together = [('game', 'profile')]
+
+
+class ViewProfile(models.Model):
+    """cProfile statistics of one request, see mastermind.profiling."""
+
+    game = models.ForeignKey(
+        Game, on_delete=models.SET_NULL, blank=True, null=True)
+    view = models.CharField(max_length=200)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2000)
+    created_time = models.DateTimeField(auto_now_add=True)
+    duration = models.FloatField(verbose_name='varighed (s)')
+    summary = models.TextField(blank=True, verbose_name='oversigt')
+    # The marshalled stats dict, as written by pstats.Stats.dump_stats
+    stats = models.BinaryField()
+
+    def __str__(self):
+        return '%s %s (%s)' % (self.method, self.path, self.created_time)
+
+    class Meta:
+        verbose_name = 'profilering'
+        verbose_name_plural = verbose_name + 'er'
+        ordering = ['-created_time']
@@ -0,0 +1,28 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from mastermind.instrumentation import record_cache
+from mastermind.models import Game
+
+
+# Cache key of the list of open games, and the name of the template
+# fragment in home.html that renders it.
+OPEN_GAMES_KEY = 'mastermind-open-games'
+OPEN_GAMES_FRAGMENT = 'mastermind_open_games'
+OPEN_GAMES_TIMEOUT = 300
+
+
+def get_open_games():
+    games = cache.get(OPEN_GAMES_KEY)
+    record_cache(games is not None)
+    if games is None:
+        games = list(Game.objects.filter(mode=Game.OPEN).order_by('title'))
+        cache.set(OPEN_GAMES_KEY, games, OPEN_GAMES_TIMEOUT)
+    return games
+
+
+def invalidate_open_games():
+    """Must be called whenever a game is opened, closed, renamed or
+    deleted."""
+    cache.delete_many([OPEN_GAMES_KEY,
+                       make_template_fragment_key(OPEN_GAMES_FRAGMENT)])
@@ -0,0 +1,260 @@
+"""Packed storage of the answers of submissions.
+
+Normally each answer of a submission is a SubmissionSlot row. In games
+with Game.packed set, new submissions instead store the ids of the
+chosen options in Submission.packed_options as one comma-separated
+string, with an empty entry for each slot left empty. The entries follow
+the layout in Game.packed_slots: the ids of the slots of the game in the
+order of their positions when the game was packed, with slots created
+later appended, so moving slots does not rewrite any submissions.
+The feedback of packed answers is not stored but computed from the
+answer key when read, and Option.packed_usage counts the packed answers
+that chose each option.
+
+get_answers and get_submission_slots read both kinds of submissions, so
+pack_game and unpack_game can convert a game in batches while it is
+being played.
+"""
+import collections
+
+from django.db import transaction
+from django.db.models import F
+
+from mastermind import feedback
+from mastermind.answerkey import AnswerKey
+from mastermind.db import BATCH_SIZE, bulk_update
+from mastermind.models import (
+    Game, Option, Slot, Submission, SubmissionSlot,
+)
+
+
+def pack(answers, layout):
+    """Return the packed form of a dict mapping slot ids to option ids."""
+    option_ids = [answers.get(slot_id) for slot_id in layout]
+    while option_ids and option_ids[-1] is None:
+        option_ids.pop()
+    return ','.join('' if pk is None else '%s' % pk for pk in option_ids)
+
+
+def unpack(packed, layout):
+    """Return (slot id, option id) of each answer in the packed string."""
+    return [(slot_id, int(pk))
+            for slot_id, pk in zip(layout, packed.split(',')) if pk]
+
+
+def packed_option_ids(packed):
+    return [int(pk) for pk in packed.split(',') if pk]
+
+
+def add_usage(option_ids, sign=1):
+    """Add the number of times each option occurs in option_ids to its
+    Option.packed_usage, or subtract it if sign is -1."""
+    by_count = collections.defaultdict(list)
+    for pk, n in collections.Counter(option_ids).items():
+        by_count[sign * n].append(pk)
+    for n, pks in by_count.items():
+        for i in range(0, len(pks), BATCH_SIZE):
+            Option.objects.filter(pk__in=pks[i:i + BATCH_SIZE]).update(
+                packed_usage=F('packed_usage') + n)
+
+
+def get_packed_option_ids(submissions):
+    """Return the option ids of the packed answers of the given queryset
+    of Submissions, with an entry for each answer."""
+    qs = submissions.exclude(packed_options=None).order_by()
+    return [pk for packed in qs.values_list('packed_options', flat=True)
+            for pk in packed_option_ids(packed)]
+
+
+def get_layout(game):
+    if not game.packed_slots:
+        return []
+    return [int(pk) for pk in game.packed_slots.split(',')]
+
+
+def extend_layout(game, slot_ids):
+    """Append the slots that are not in the layout of the game to it and
+    return the layout."""
+    layout = get_layout(game)
+    known = set(layout)
+    missing = False
+    for pk in slot_ids:
+        if pk not in known:
+            known.add(pk)
+            layout.append(pk)
+            missing = True
+    if missing:
+        game.packed_slots = ','.join('%s' % pk for pk in layout)
+        Game.objects.filter(pk=game.pk).update(
+            packed_slots=game.packed_slots)
+    return layout
+
+
+def iter_packed(answer_key, layout, packed):
+    """Yield (slot id, option id, feedback) of each answer in the packed
+    string, leaving out answers in slots that no longer exist."""
+    for slot_id, option_id in unpack(packed, layout):
+        try:
+            key_id = answer_key.slot_keys[slot_id]
+        except KeyError:
+            continue
+        yield slot_id, option_id, feedback.get_canonical_feedback(
+            key_id, answer_key.canonical_ids.get(option_id),
+            answer_key.correct_ids)
+
+
+def get_answers(game, answer_key, submissions):
+    """Return (submission id, slot id, option id, feedback) of the answers
+    of the given submissions of the game in no particular order.
+
+    submissions is a list of (id, packed_options) pairs.
+    """
+    layout = get_layout(game)
+    answers = []
+    unpacked = []
+    for pk, packed in submissions:
+        if packed is None:
+            unpacked.append(pk)
+        else:
+            answers.extend((pk,) + answer for answer
+                           in iter_packed(answer_key, layout, packed))
+    for i in range(0, len(unpacked), BATCH_SIZE):
+        qs = SubmissionSlot.objects.filter(
+            submission_id__in=unpacked[i:i + BATCH_SIZE])
+        answers.extend(qs.order_by().values_list(
+            'submission_id', 'slot_id', 'option_id', 'feedback'))
+    return answers
+
+
+def get_submission_slots(game, answer_key, submissions):
+    """Return the SubmissionSlots of the given Submissions of the game with
+    their options loaded. The SubmissionSlots of packed submissions are
+    made from the packed answers and are not saved."""
+    layout = get_layout(game)
+    result = []
+    unpacked = []
+    packed = []
+    for submission in submissions:
+        if submission.packed_options is None:
+            unpacked.append(submission.pk)
+        else:
+            packed.extend(
+                (submission,) + answer for answer in iter_packed(
+                    answer_key, layout, submission.packed_options))
+    for i in range(0, len(unpacked), BATCH_SIZE):
+        qs = SubmissionSlot.objects.filter(
+            submission_id__in=unpacked[i:i + BATCH_SIZE])
+        result.extend(qs.select_related('option').order_by())
+    options = answer_key.get_options_by_pk(
+        game, (option_id for s, slot_id, option_id, f in packed))
+    for submission, slot_id, option_id, f in packed:
+        if option_id in options:
+            result.append(SubmissionSlot(
+                submission=submission, slot_id=slot_id,
+                option=options[option_id], feedback=f))
+    return result
+
+
+def iter_packed_submissions(game):
+    """Yield (submission id, packed_options) of the packed submissions of
+    the game."""
+    if not game.packed:
+        return
+    qs = Submission.objects.filter(game=game).exclude(packed_options=None)
+    for pk, packed in qs.order_by().values_list('pk', 'packed_options'):
+        yield pk, packed
+
+
+def get_scores(game):
+    """Like mastermind.feedback.get_scores, but also counting the answers
+    of packed submissions."""
+    scores = feedback.get_scores(game)
+    if not game.packed:
+        return scores
+    # Like update_feedback, this is called before the game version is
+    # bumped, so the cached answer key may be out of date.
+    answer_key = AnswerKey.load(game)
+    layout = get_layout(game)
+    for pk, packed in iter_packed_submissions(game):
+        score = scores[pk] = {k: 0 for k, v in SubmissionSlot.FEEDBACKS}
+        for slot_id, option_id, f in iter_packed(answer_key, layout, packed):
+            score[f] += 1
+    return scores
+
+
+def pack_game(game, batch_size=BATCH_SIZE):
+    """Store new submissions of the game packed and convert the existing
+    ones in batches, each in its own transaction.
+
+    Returns the number of submissions converted.
+    """
+    with transaction.atomic():
+        game.packed = True
+        game.save(update_fields=['packed'])
+        slots = Slot.objects.filter(game=game).order_by('position')
+        extend_layout(game, slots.values_list('pk', flat=True))
+    count = 0
+    last = 0
+    while True:
+        with transaction.atomic():
+            qs = Submission.objects.filter(
+                game=game, packed_options=None, pk__gt=last)
+            pks = list(qs.order_by('pk').values_list(
+                'pk', flat=True)[:batch_size])
+            if not pks:
+                return count
+            last = pks[-1]
+            answers = {pk: {} for pk in pks}
+            qs = SubmissionSlot.objects.filter(submission_id__in=pks)
+            qs = qs.order_by().values_list(
+                'submission_id', 'slot_id', 'option_id')
+            for submission_id, slot_id, option_id in qs:
+                answers[submission_id][slot_id] = option_id
+            # Slots created since the layout was made
+            layout = extend_layout(
+                game, [slot_id for a in answers.values() for slot_id in a])
+            bulk_update([Submission(pk=pk, packed_options=pack(a, layout))
+                         for pk, a in answers.items()], ['packed_options'])
+            add_usage(pk for a in answers.values() for pk in a.values())
+            SubmissionSlot.objects.filter(submission_id__in=pks).delete()
+        count += len(pks)
+
+
+def unpack_game(game, batch_size=BATCH_SIZE):
+    """Convert the packed submissions of the game to SubmissionSlots in
+    batches, each in its own transaction, and then store new submissions
+    as SubmissionSlots again.
+
+    Submissions saved packed by requests that loaded the game before it
+    was unpacked stay packed, so this should be done while the game is
+    closed. Returns the number of submissions converted.
+    """
+    answer_key = AnswerKey.load(game)
+    layout = get_layout(game)
+    count = 0
+    while True:
+        with transaction.atomic():
+            qs = Submission.objects.filter(game=game)
+            qs = qs.exclude(packed_options=None).order_by('pk')
+            submissions = list(qs.values_list(
+                'pk', 'packed_options')[:batch_size])
+            if not submissions:
+                game.packed = False
+                game.packed_slots = ''
+                game.save(update_fields=['packed', 'packed_slots'])
+                return count
+            answers = [(pk,) + answer for pk, packed in submissions
+                       for answer in iter_packed(answer_key, layout, packed)]
+            options = answer_key.get_options_by_pk(
+                game, (option_id for pk, slot_id, option_id, f in answers))
+            SubmissionSlot.objects.bulk_create(
+                (SubmissionSlot(submission_id=pk, slot_id=slot_id,
+                                option_id=option_id, feedback=f)
+                 for pk, slot_id, option_id, f in answers
+                 if option_id in options),
+                batch_size=batch_size)
+            pks = [pk for pk, packed in submissions]
+            Submission.objects.filter(pk__in=pks).update(packed_options=None)
+            add_usage((pk for p, packed in submissions
+                       for pk in packed_option_ids(packed)), sign=-1)
+        count += len(submissions)
@@ -0,0 +1,65 @@
+"""Opt-in cProfile of the views of a single game.
+
+A request is profiled if the MASTERMIND_PROFILE_VIEWS setting is true,
+or if a superuser adds ?cprofile to the URL. The statistics are saved
+as a ViewProfile, which can be downloaded from the admin and opened
+with pstats or snakeviz. Requests that are not profiled only pay for
+the check in profiling_requested.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import timeit
+
+from django.conf import settings
+
+from mastermind.models import ViewProfile
+
+
+PROFILE_PARAMETER = 'cprofile'
+
+# Number of functions listed in ViewProfile.summary
+SUMMARY_LINES = 40
+
+
+def profiling_requested(request):
+    if getattr(settings, 'MASTERMIND_PROFILE_VIEWS', False):
+        return True
+    return (PROFILE_PARAMETER in request.GET and
+            request.user.is_superuser)
+
+
+def profile_view(view, func, request, *args, **kwargs):
+    """Call func(view, request, ...) and render its response under
+    cProfile, and save the statistics."""
+    profiler = cProfile.Profile()
+    start = timeit.default_timer()
+    profiler.enable()
+    try:
+        response = func(view, request, *args, **kwargs)
+        # Template responses are rendered after the view returns, so
+        # render them here to include the template in the profile.
+        if (hasattr(response, 'render') and callable(response.render) and
+                not response.is_rendered):
+            response.render()
+    finally:
+        profiler.disable()
+        duration = timeit.default_timer() - start
+    stats = pstats.Stats(profiler)
+    data = marshal.dumps(stats.stats)
+
+    summary = io.StringIO()
+    stats.stream = summary
+    stats.strip_dirs().sort_stats('cumulative').print_stats(SUMMARY_LINES)
+
+    match = request.resolver_match
+    ViewProfile.objects.create(
+        game=getattr(view, 'game', None),
+        view=match.view_name if match else '',
+        method=request.method,
+        path=request.get_full_path()[:2000],
+        duration=duration,
+        summary=summary.getvalue(),
+        stats=data)
+    return response
@@ -40,6 +40,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'mastermind.middleware.Middleware',
+    'mastermind.middleware.InstrumentationMiddleware',
 ]
 
 ROOT_URLCONF = 'mastermind.urls'
@@ -62,6 +63,34 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'mastermind.wsgi.application'
 
+# The game admin form has three fields per slot and one per option on the
+# page.
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
+
+
+# Profile every request to a game page with cProfile, see
+# mastermind.profiling. Superusers can profile single requests by adding
+# ?cprofile to the URL.
+MASTERMIND_PROFILE_VIEWS = False
+
+# One JSON line per request from InstrumentationMiddleware
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'mastermind.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/1.10/ref/settings/#databases
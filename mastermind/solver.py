@@ -0,0 +1,132 @@
+from mastermind.models import Option, SubmissionSlot
+
+
+def popcount(x):
+    return bin(x).count('1')
+
+
+def lowest_bit(x):
+    return x & -x
+
+
+class Solver(object):
+    """Track the answer keys that are consistent with a player's feedback.
+
+    The possible keys of each slot are stored as a bitset over the
+    canonical options of the game, where the bit after the last option
+    means that the slot has no key. Feedback is applied one SubmissionSlot
+    at a time and its consequences are propagated between the slots,
+    so the product space of assignments is never enumerated.
+    """
+
+    def __init__(self, slot_ids, option_ids):
+        self.slot_ids = list(slot_ids)
+        self.option_ids = list(option_ids)
+        self.slot_index = {pk: i for i, pk in enumerate(self.slot_ids)}
+        self.option_index = {pk: i for i, pk in enumerate(self.option_ids)}
+        self.no_key = 1 << len(self.option_ids)
+        self.all_options = self.no_key - 1
+        self.domains = [self.all_options | self.no_key] * len(self.slot_ids)
+        # Options that are the key of at least one slot
+        self.required = 0
+        # Options that are not the key of any slot
+        self.excluded = 0
+        self.consistent = True
+
+    @classmethod
+    def for_answer_key(cls, answer_key):
+        slot_ids = [pk for pk, position, stem, key_id in answer_key.slots]
+        option_ids = [pk for pk, kind, alias_target_id, text
+                      in answer_key.options if kind == Option.CANONICAL]
+        return cls(slot_ids, option_ids)
+
+    def add(self, slot_id, option_id, feedback, propagate=True):
+        """Apply the feedback given for choosing the canonical option
+        option_id in the given slot.
+
+        option_id is None if the chosen option was unconfirmed, in which
+        case the feedback carries no information.
+        """
+        try:
+            s = self.slot_index[slot_id]
+            b = 1 << self.option_index[option_id]
+        except KeyError:
+            return
+        if feedback == SubmissionSlot.CORRECT:
+            self.domains[s] &= b
+            self.required |= b
+        elif feedback == SubmissionSlot.OTHER:
+            self.domains[s] &= ~(b | self.no_key)
+            self.required |= b
+        elif feedback == SubmissionSlot.WRONG:
+            self.domains[s] &= ~self.no_key
+            self.excluded |= b
+        elif feedback == SubmissionSlot.UNKNOWN:
+            self.domains[s] &= self.no_key
+        if propagate:
+            self.propagate()
+
+    def propagate(self):
+        changed = True
+        while changed and self.consistent:
+            changed = False
+            if self.required & self.excluded:
+                self.consistent = False
+                break
+            for s, d in enumerate(self.domains):
+                d &= ~self.excluded
+                if d == 0:
+                    self.consistent = False
+                elif d != self.no_key and popcount(d) == 1:
+                    # The slot's key is known, so it is a key somewhere.
+                    self.required |= d
+                if d != self.domains[s]:
+                    self.domains[s] = d
+                    changed = True
+            required = self.required
+            while required:
+                b = lowest_bit(required)
+                required ^= b
+                holders = [s for s, d in enumerate(self.domains) if d & b]
+                if not holders:
+                    self.consistent = False
+                elif len(holders) == 1 and self.domains[holders[0]] != b:
+                    # Only one slot can have this required key.
+                    self.domains[holders[0]] = b
+                    changed = True
+
+    def candidates(self, slot_id):
+        """Return the ids of the options that may be the key of the slot,
+        including None if the slot may have no key."""
+        d = self.domains[self.slot_index[slot_id]]
+        result = [pk for i, pk in enumerate(self.option_ids) if d >> i & 1]
+        if d & self.no_key:
+            result.append(None)
+        return result
+
+    def suggest(self):
+        """Propose the next guess as a list of option ids (or None) in the
+        order of the slots.
+
+        Slots with a known key get that key. The remaining slots, the
+        most constrained first, get a distinct option from their
+        candidates, preferring options known to be a key somewhere and
+        then options that have not been tried yet, since a wrong guess
+        rules out the option in every slot.
+        """
+        tried = self.required | self.excluded
+        used = 0
+        guess = [0] * len(self.slot_ids)
+        order = sorted(range(len(self.slot_ids)),
+                       key=lambda s: popcount(self.domains[s]))
+        for s in order:
+            d = self.domains[s] & self.all_options
+            if d == 0:
+                continue
+            pools = (d & self.required & ~used, d & ~tried & ~used,
+                     d & ~used, d)
+            b = lowest_bit(next(p for p in pools if p))
+            guess[s] = b
+            used |= b
+        return [self.option_ids[b.bit_length() - 1] if b else None
+                for b in guess]
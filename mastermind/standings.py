@@ -0,0 +1,46 @@
+from django.db.models import F, Q
+
+from mastermind.models import Standing, Submission, SubmissionSlot
+from mastermind.packing import get_scores
+
+
+def record_submission(submission, feedbacks):
+    """Update the standing of the submission's profile with a new
+    submission whose slots received the given feedback."""
+    correct = feedbacks.count(SubmissionSlot.CORRECT)
+    other = feedbacks.count(SubmissionSlot.OTHER)
+    Standing.objects.get_or_create(
+        game=submission.game, profile=submission.profile)
+    qs = Standing.objects.filter(
+        game=submission.game, profile=submission.profile)
+    qs.update(submission_count=F('submission_count') + 1)
+    better = (Q(best_submission=None) |
+              Q(best_correct__lt=correct) |
+              Q(best_correct=correct, best_other__lt=other))
+    qs.filter(better).update(best_submission=submission,
+                             best_correct=correct, best_other=other)
+
+
+def rebuild_standings(game):
+    """Recompute all standings of the game from the stored feedback.
+
+    Must be called after update_feedback changed the feedback."""
+    scores = get_scores(game)
+    standings = {}
+    qs = Submission.objects.filter(game=game).order_by('created_time')
+    for pk, profile_id in qs.values_list('pk', 'profile_id'):
+        score = scores.get(pk, {})
+        key = (score.get(SubmissionSlot.CORRECT, 0),
+               score.get(SubmissionSlot.OTHER, 0))
+        try:
+            standing = standings[profile_id]
+        except KeyError:
+            standing = standings[profile_id] = Standing(
+                game=game, profile_id=profile_id)
+        standing.submission_count += 1
+        if (standing.best_submission_id is None or
+                key > (standing.best_correct, standing.best_other)):
+            standing.best_submission_id = pk
+            standing.best_correct, standing.best_other = key
+    Standing.objects.filter(game=game).delete()
+    Standing.objects.bulk_create(standings.values())
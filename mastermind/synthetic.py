@@ -0,0 +1,96 @@
+import random
+
+from django.test import Client
+
+from mastermind.db import BATCH_SIZE
+from mastermind.feedback import get_feedback
+from mastermind.middleware import PROFILE_KEY, PROFILE_USER_KEY
+from mastermind.models import (
+    Game, Slot, Option, Profile, Submission, SubmissionSlot,
+)
+from mastermind.standings import rebuild_standings
+
+
+# Sizes used by the benchmark_views and loadtest commands
+SCALES = {
+    'small': dict(slots=5, options=20, aliases=5, unconfirmed=5,
+                  profiles=5, submissions=5),
+    'medium': dict(slots=20, options=100, aliases=40, unconfirmed=50,
+                   profiles=20, submissions=10),
+    'large': dict(slots=40, options=500, aliases=200, unconfirmed=200,
+                  profiles=50, submissions=20),
+}
+
+
+def create_game(owner=None, slots=10, options=50, aliases=10,
+                unconfirmed=0, mode=Game.OPEN, title='Synthetic', seed=0):
+    """Create an open game where every slot has a random canonical key."""
+    rng = random.Random(seed)
+    game = Game.objects.create(owner=owner, mode=mode, title=title)
+    Option.objects.bulk_create(
+        Option(game=game, kind=Option.CANONICAL, text='option %d' % i)
+        for i in range(options))
+    canonical = list(game.option_set.order_by('pk'))
+    Option.objects.bulk_create(
+        Option(game=game, kind=Option.ALIAS, text='alias %d' % i,
+               alias_target=rng.choice(canonical))
+        for i in range(aliases))
+    Option.objects.bulk_create(
+        Option(game=game, kind=Option.UNCONFIRMED, text='unconfirmed %d' % i)
+        for i in range(unconfirmed))
+    Slot.objects.bulk_create(
+        Slot(game=game, position=i + 1, stem='slot %d' % (i + 1),
+             key=rng.choice(canonical))
+        for i in range(slots))
+    return game
+
+
+def create_submissions(game, profiles=10, submissions=5, seed=0):
+    """Create the given number of profiles that each make the given number
+    of random guesses in the game."""
+    rng = random.Random(seed)
+    slots = list(game.slot_set.order_by('position'))
+    options = list(game.option_set.order_by('pk'))
+    correct_ids = set(s.key_id for s in slots if s.key_id is not None)
+    submission_slots = []
+    for i in range(profiles):
+        profile = Profile.objects.create(name='Player %d' % i)
+        for j in range(submissions):
+            submission = Submission.objects.create(game=game, profile=profile)
+            for slot in slots:
+                option = rng.choice(options)
+                submission_slots.append(SubmissionSlot(
+                    submission=submission, slot=slot, option=option,
+                    feedback=get_feedback(slot.key_id, option, correct_ids)))
+    SubmissionSlot.objects.bulk_create(
+        submission_slots, batch_size=BATCH_SIZE)
+    rebuild_standings(game)
+
+
+def client_for(profile):
+    """Return a test client whose session belongs to the profile."""
+    client = Client()
+    session = client.session
+    session[PROFILE_KEY] = profile.pk
+    session[PROFILE_USER_KEY] = profile.user_id
+    session.save()
+    return client
+
+
+def admin_post_data(game):
+    """Return POST data for the game admin that changes nothing."""
+    data = {'mode': game.mode, 'new_slots': '', 'new_options': ''}
+    for slot in game.slot_set.select_related('key'):
+        k = 's-%s' % slot.pk
+        data[k + '-p'] = slot.position
+        data[k + '-s'] = slot.stem
+        data[k + '-k'] = slot.key.text if slot.key else ''
+    for option in game.option_set.select_related('alias_target'):
+        k = 'o-%s' % option.pk
+        if option.kind == Option.CANONICAL:
+            data[k] = option.text
+        elif option.kind == Option.ALIAS:
+            data[k] = option.alias_target.text
+        else:
+            data[k] = ''
+    return data
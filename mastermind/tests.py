@@ -0,0 +1,294 @@
+import re
+import unittest
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+
+from mastermind.answerkey import get_answer_key
+from mastermind.forms import GameAdminForm
+from mastermind.models import (
+    Game, Option, Profile, Slot, Standing, Submission,
+)
+from mastermind.opengames import get_open_games
+from mastermind.packing import pack_game
+from mastermind.standings import rebuild_standings
+from mastermind.synthetic import (
+    admin_post_data, client_for, create_game, create_submissions,
+)
+from mastermind.views import GameAdmin
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN')
+class IndexTest(TestCase):
+    """The per-game queries search the indexes of migration 0007 instead
+    of scanning or sorting the table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = Game.objects.create(title='Spil')
+        cls.profile = Profile.objects.create()
+
+    def get_index(self, model, columns):
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, table)
+        for name, constraint in constraints.items():
+            if constraint['index'] and constraint['columns'] == columns:
+                return name
+        self.fail('No index on %s%s' % (table, columns))
+
+    def get_plan(self, qs):
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, qs, model, columns):
+        plan = self.get_plan(qs)
+        self.assertIn(self.get_index(model, columns), plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        if model is not Game:
+            # Ordering by the game would join mastermind_game
+            self.assertNotIn(Game._meta.db_table + ' ', plan)
+
+    def test_submissions(self):
+        qs = Submission.objects.filter(game=self.game, profile=self.profile)
+        self.assertUsesIndex(
+            qs.order_by('created_time'), Submission,
+            ['game_id', 'profile_id', 'created_time'])
+
+    def test_options(self):
+        qs = Option.objects.filter(game=self.game, kind=Option.UNCONFIRMED)
+        self.assertUsesIndex(
+            qs.order_by('text'), Option, ['game_id', 'kind', 'text'])
+
+    def test_slots(self):
+        qs = Slot.objects.filter(game=self.game)
+        self.assertUsesIndex(
+            qs.order_by('position'), Slot, ['game_id', 'position'])
+
+    def test_open_games(self):
+        qs = Game.objects.filter(mode=Game.OPEN)
+        self.assertUsesIndex(qs.order_by('title'), Game, ['mode', 'title'])
+
+
+class GameAdminQueryTest(TestCase):
+    """Saving the game admin takes the same number of queries regardless
+    of the number of slots and options."""
+
+    def setUp(self):
+        cache.clear()
+
+    # The query counts include the SAVEPOINT and RELEASE of the view's
+    # transaction within the test's transaction.
+    def post(self, num_queries, size, change_key=False):
+        owner = Profile.objects.create(name='Owner')
+        game = create_game(owner=owner, slots=size, options=size * 10,
+                           aliases=size * 4, unconfirmed=size * 4)
+        path = '/game/%s/admin/' % game.pk
+        data = admin_post_data(game)
+        if change_key:
+            slot = game.slot_set.order_by('position')[0]
+            data['s-%s-k' % slot.pk] = 'option %s' % (size * 10 - 1)
+        client = client_for(owner)
+        # Cache the answer key
+        self.assertEqual(client.get(path).status_code, 200)
+        with self.assertNumQueries(num_queries):
+            response = client.post(path, data)
+        self.assertEqual(response.status_code, 302)
+        return game
+
+    def test_unchanged(self):
+        self.post(5, 2)
+        self.post(5, 50)
+
+    def test_change_key(self):
+        for size in (2, 50):
+            game = self.post(10, size, change_key=True)
+            slot = game.slot_set.order_by('position')[0]
+            self.assertEqual(slot.key.text, 'option %s' % (size * 10 - 1))
+
+
+class GameAdminFormQueryTest(TestCase):
+    """GameAdminForm is built from the answer key, so rendering the game
+    admin takes the two queries of loading the answer key on a cold cache
+    more than on a warm one, however many aliases the game has."""
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, num_queries, client, game):
+        with self.assertNumQueries(num_queries):
+            response = client.get('/game/%s/admin/' % game.pk)
+        self.assertEqual(response.status_code, 200)
+        # The CSRF token is masked differently in each response
+        return re.sub(r"name='csrfmiddlewaretoken' value='[^']*'", '',
+                      response.content.decode())
+
+    def test_aliases(self):
+        owner = Profile.objects.create(name='Owner')
+        client = client_for(owner)
+        for aliases in (2, 200):
+            game = create_game(owner=owner, slots=5, options=20,
+                               aliases=aliases)
+            cold = self.render(5, client, game)
+            warm = self.render(3, client, game)
+            self.assertEqual(cold, warm)
+            alias = game.option_set.filter(kind=Option.ALIAS)[0]
+            self.assertIn('value="%s"' % alias.alias_target.text, cold)
+
+
+class GameAdminFormTest(TestCase):
+    def test_existing_new_option_and_new_target(self):
+        game = create_game(slots=2, options=3, aliases=0)
+        option = game.option_set.order_by('pk')[0]
+        data = admin_post_data(game)
+        data['new_options'] = option.text
+        data['o-%s' % option.pk] = 'Z'
+        answer_key = get_answer_key(game)
+        form = GameAdminForm(data=data, game=game, answer_key=answer_key,
+                             options=answer_key.get_options(game))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['new_options'],
+                         ['"%s" findes allerede' % option.text])
+
+
+class GameAdminPaginationTest(TestCase):
+    """The game admin only has fields for the options on the page, and
+    the slot keys and alias targets may be options on other pages."""
+
+    def setUp(self):
+        cache.clear()
+        paginate_by = GameAdmin.paginate_by
+        GameAdmin.paginate_by = 5
+        self.addCleanup(setattr, GameAdmin, 'paginate_by', paginate_by)
+        self.owner = Profile.objects.create(name='Owner')
+        self.client = client_for(self.owner)
+        self.game = create_game(owner=self.owner, slots=2, options=20,
+                                aliases=0)
+        self.path = '/game/%s/admin/' % self.game.pk
+        self.last = self.game.option_set.get(text='option 19')
+
+    def post(self, path, data):
+        response = self.client.post(path, data)
+        if response.status_code != 302:
+            self.fail(response.context['form'].errors)
+        return response
+
+    def test_mode_and_key(self):
+        response = self.client.get(self.path)
+        data = admin_post_data(self.game)
+        data = {k: v for k, v in data.items()
+                if k in response.context['form'].fields}
+        self.assertEqual(
+            sum(k.startswith('o-') for k in data), GameAdmin.paginate_by)
+        self.assertNotIn('o-%s' % self.last.pk, data)
+        data['mode'] = Game.OPEN
+        slot = self.game.slot_set.order_by('position')[0]
+        data['s-%s-k' % slot.pk] = self.last.text
+        response = self.post(self.path + '?page=2', data)
+        self.assertEqual(response['Location'], self.path + '?page=2')
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.mode, Game.OPEN)
+        slot.refresh_from_db()
+        self.assertEqual(slot.key_id, self.last.pk)
+
+    def test_alias_of_other_page(self):
+        alias = self.game.option_set.get(text='option 0')
+        slots = {k: v for k, v in admin_post_data(self.game).items()
+                 if not k.startswith('o-')}
+        self.post(self.path, dict(slots, **{'o-%s' % alias.pk: 'option 19'}))
+        alias.refresh_from_db()
+        self.assertEqual(alias.alias_target_id, self.last.pk)
+        # The target may not become an alias while the alias is not posted
+        data = dict(slots, **{'o-%s' % self.last.pk: 'option 1'})
+        response = self.client.post(self.path, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['form'].errors['new_options'],
+            ['"%s" peger på "%s" som ikke peger på sig selv' %
+             (alias.text, self.last.text)])
+
+
+class GameImportTest(TestCase):
+    def test_mode(self):
+        owner = Profile.objects.create(name='Owner')
+        data = 'slot,Hovedstaden i Frankrig,Paris\noption,Paris,\n'
+        response = client_for(owner).post('/game/import/', {
+            'title': 'Byer', 'format': 'csv', 'mode': Game.OPEN,
+            'file': SimpleUploadedFile('byer.csv', data.encode())})
+        self.assertEqual(response.status_code, 302)
+        game = Game.objects.get(title='Byer')
+        self.assertEqual(game.mode, Game.OPEN)
+        self.assertEqual(get_open_games(), [game])
+
+
+class DjangoAdminDeleteTest(TestCase):
+    """Deleting in the Django admin keeps derived data up to date."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_superuser('admin', '', 'admin')
+        self.client.force_login(user)
+        self.game = create_game(slots=3, options=5, aliases=0)
+        create_submissions(self.game, profiles=2, submissions=2)
+
+    def delete_selected(self, model, objs):
+        path = '/admin/mastermind/%s/' % model._meta.model_name
+        data = {'action': 'delete_selected',
+                '_selected_action': [o.pk for o in objs]}
+        # The confirmation page posts back to the same action
+        response = self.client.post(path, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(model.objects.filter(
+            pk__in=[o.pk for o in objs]).exists())
+        response = self.client.post(path, dict(data, post='yes'))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(model.objects.filter(
+            pk__in=[o.pk for o in objs]).exists())
+
+    def assertPackedUsage(self):
+        usage = {o.pk: 0 for o in self.game.option_set.all()}
+        for packed in Submission.objects.values_list(
+                'packed_options', flat=True):
+            for pk in packed.split(','):
+                if pk:
+                    usage[int(pk)] += 1
+        self.assertEqual(
+            dict(self.game.option_set.values_list('pk', 'packed_usage')),
+            usage)
+
+    def test_packed_submissions(self):
+        pack_game(self.game)
+        submissions = list(Submission.objects.order_by('pk'))
+        self.delete_selected(Submission, submissions[:2])
+        self.assertPackedUsage()
+        self.delete_selected(Profile, [submissions[-1].profile])
+        self.assertPackedUsage()
+
+    def get_standings(self):
+        return sorted(Standing.objects.filter(game=self.game).values_list(
+            'profile_id', 'submission_count', 'best_submission_id',
+            'best_correct', 'best_other'))
+
+    def test_standings(self):
+        submissions = list(Submission.objects.order_by('pk'))
+        self.delete_selected(Submission, submissions[:1])
+        response = self.client.post(
+            '/admin/mastermind/submission/%s/delete/' % submissions[-1].pk,
+            {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        standings = self.get_standings()
+        self.assertEqual(sum(s[1] for s in standings), len(submissions) - 2)
+        rebuild_standings(self.game)
+        self.assertEqual(standings, self.get_standings())
+
+    def test_open_games(self):
+        games = [self.game, create_game(title='Andet spil')]
+        self.assertEqual(len(get_open_games()), 2)
+        self.delete_selected(Game, games)
+        self.assertEqual(get_open_games(), [])
@@ -16,18 +16,27 @@ Including another URLconf
 from django.conf.urls import url
 from django.contrib import admin
 from mastermind.views import (
-    Home, GameCreate, GameSubmission,
-    GameAdmin, GameUnconfirmedOptions,
+    Home, GameCreate, GameImport, GameSubmission,
+    GameAdmin, GameUnconfirmedOptions, GameLeaderboard, GameExport,
+    Stats, GameApi,
 )
 
 urlpatterns = [
     url(r'^admin/', admin.site.urls),
     url(r'^$', Home.as_view(), name='home'),
     url(r'^game/new/$', GameCreate.as_view(), name='game_create'),
+    url(r'^game/import/$', GameImport.as_view(), name='game_import'),
     url(r'^game/(?P<pk>\d+)/$', GameSubmission.as_view(),
         name='game_submission_create'),
     url(r'^game/(?P<pk>\d+)/admin/$', GameAdmin.as_view(), name='game_admin'),
     url(r'^game/(?P<pk>\d+)/admin/unconfirmed/$',
         GameUnconfirmedOptions.as_view(),
         name='game_unconfirmed_options'),
+    url(r'^game/(?P<pk>\d+)/admin/leaderboard/$',
+        GameLeaderboard.as_view(),
+        name='game_leaderboard'),
+    url(r'^game/(?P<pk>\d+)/admin/export/$', GameExport.as_view(),
+        name='game_export'),
+    url(r'^stats/$', Stats.as_view(), name='stats'),
+    url(r'^api/game/(?P<pk>\d+)/$', GameApi.as_view(), name='game_api'),
 ]
@@ -1,15 +1,39 @@
 import functools
+import hashlib
+import json
 from django.core.exceptions import ValidationError
 from django.views.defaults import permission_denied, page_not_found
-from django.views.generic import TemplateView, FormView
+from django.views.generic import View, TemplateView, FormView
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, get_object_or_404
-# from django.urls import reverse
-from django.db.models import Count
+from django.utils import six
+from django.utils.decorators import method_decorator
+from django.utils.functional import cached_property
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.urls import reverse
+from django.utils.http import urlencode, quote_etag
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, IntegerField
 from mastermind.forms import (
-    GameCreateForm, GameUnconfirmedOptionsForm,
+    GameCreateForm, GameImportForm, GameUnconfirmedOptionsForm,
     GameSubmissionForm, GameAdminForm,
 )
-from mastermind.models import Game, Slot, Option, Submission, SubmissionSlot
+from mastermind.models import (
+    Game, Slot, Option, Submission, Standing,
+)
+from mastermind.feedback import update_feedback
+from mastermind.db import bulk_create_options, bulk_update
+from mastermind.answerkey import get_answer_key
+from mastermind.opengames import get_open_games, invalidate_open_games
+from mastermind.solver import Solver
+from mastermind.standings import rebuild_standings
+from mastermind.instrumentation import BUCKETS, histogram
+from mastermind.matching import get_match_index
+from mastermind.export import FORMATS
+from mastermind.packing import get_submission_slots
+from mastermind.profiling import profiling_requested, profile_view
 
 
 class Home(TemplateView):
@@ -22,13 +46,16 @@ class Home(TemplateView):
             own_games = profile.game_set.all()
             own_games = own_games.annotate(
                 submission_count=Count('submission'))
-            my_submissions = profile.submission_set.all()
+            my_games = Game.objects.filter(submission__profile=profile)
+            my_games = my_games.annotate(
+                my_submission_count=Count('submission'))
         else:
             own_games = []
-            my_submissions = []
+            my_games = []
         data['own_games'] = own_games
-        data['my_submissions'] = my_submissions
-        data['games'] = Game.objects.filter(mode=Game.OPEN)
+        data['my_games'] = my_games
+        # Only called by the template if the fragment is not cached
+        data['games'] = get_open_games
         data['game_create_form'] = GameCreateForm()
         return data
 
@@ -72,30 +99,68 @@ class GameCreate(FormView):
         return redirect('game_admin', pk=game.pk)
 
 
+class GameImport(FormView):
+    form_class = GameImportForm
+    template_name = 'mastermind/game_import.html'
+
+    def form_valid(self, form):
+        game = form.cleaned_data['data'].save(
+            self.request.get_or_create_profile(), form.cleaned_data['title'],
+            mode=form.cleaned_data['mode'])
+        return redirect('game_admin', pk=game.pk)
+
+
+def game_etag(game, *parts):
+    """Return an ETag for a page that only depends on the given parts and
+    on the game, whose version is bumped whenever its slots or options
+    change."""
+    parts = (game.pk, game.version, game.mode, game.title) + parts
+    data = '\n'.join('%s' % (p,) for p in parts)
+    return hashlib.md5(data.encode('utf-8')).hexdigest()
+
+
 def single_game_decorator(middleware):
     def decorator(cls):
         dispatch = cls.dispatch
-        get_context_data = cls.get_context_data
+        get_context_data = getattr(cls, 'get_context_data', None)
 
-        @functools.wraps(dispatch)
-        def dispatch_wrapped(self, request, *args, **kwargs):
+        def dispatch_game(self, request, *args, **kwargs):
             super_func = dispatch.__get__(self, type(self))
             game = get_object_or_404(Game.objects, pk=kwargs.pop('pk'))
             response = middleware(request, game)
             if response is not None:
                 return response
             self.game = game
-            return super_func(request, *args, **kwargs)
+            # Answer conditional requests before the view loads anything
+            etag = response = None
+            if request.method in ('GET', 'HEAD') and hasattr(self, 'get_etag'):
+                etag = self.get_etag(request)
+                response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = super_func(request, *args, **kwargs)
+            if etag is not None and response.status_code in (200, 304):
+                response['ETag'] = quote_etag(etag)
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
 
-        @functools.wraps(get_context_data)
-        def get_context_data_wrapped(self, **kwargs):
-            super_func = get_context_data.__get__(self, type(self))
-            data = super_func(**kwargs)
-            data['game'] = self.game
-            return data
+        @functools.wraps(dispatch)
+        def dispatch_wrapped(self, request, *args, **kwargs):
+            if profiling_requested(request):
+                return profile_view(
+                    self, dispatch_game, request, *args, **kwargs)
+            return dispatch_game(self, request, *args, **kwargs)
 
         cls.dispatch = dispatch_wrapped
-        cls.get_context_data = get_context_data_wrapped
+
+        if get_context_data is not None:
+            @functools.wraps(get_context_data)
+            def get_context_data_wrapped(self, **kwargs):
+                super_func = get_context_data.__get__(self, type(self))
+                data = super_func(**kwargs)
+                data['game'] = self.game
+                return data
+
+            cls.get_context_data = get_context_data_wrapped
         return cls
 
     return decorator
@@ -117,14 +182,66 @@ def single_game_admin(request, game):
 class GameAdmin(FormView):
     template_name = 'mastermind/game_admin.html'
     form_class = GameAdminForm
+    # Options per page. Every slot is on every page.
+    paginate_by = 500
+    kinds = (Option.CANONICAL, Option.UNCONFIRMED, Option.ALIAS)
+
+    def get_etag(self, request):
+        # The page lists every slot and a page of options. Guesses that
+        # create options bump the version, so they change the ETag too.
+        return game_etag(self.game, request.GET.get('page', ''))
+
+    def get_option_ids(self, answer_key):
+        """Return the ids of the options on the page in order, and the
+        page."""
+        options = sorted(answer_key.options,
+                         key=lambda o: self.kinds.index(o.kind))
+        if self.request.method == 'POST':
+            # Only the options on the page that was submitted
+            pks = set(int(k[2:]) for k in self.request.POST
+                      if k.startswith('o-') and k[2:].isdigit())
+            return [o.pk for o in options if o.pk in pks], None
+        paginator = Paginator(options, self.paginate_by)
+        try:
+            page = paginator.page(self.request.GET.get('page', 1))
+        except PageNotAnInteger:
+            page = paginator.page(1)
+        except EmptyPage:
+            page = paginator.page(paginator.num_pages)
+        return [o.pk for o in page.object_list], page
+
+    def get_options(self, answer_key, pks):
+        """Return a dict mapping the given option ids to Options with their
+        alias targets loaded."""
+        options = answer_key.get_options_by_pk(self.game, pks)
+        targets = answer_key.get_options_by_pk(
+            self.game, (o.alias_target_id for o in options.values()
+                        if o.alias_target_id is not None))
+        for o in options.values():
+            if o.alias_target_id is not None:
+                o.alias_target = targets[o.alias_target_id]
+        return options
 
     def get_form_kwargs(self, **kwargs):
         data = super(GameAdmin, self).get_form_kwargs(**kwargs)
+        answer_key = get_answer_key(self.game)
+        pks, self.page = self.get_option_ids(answer_key)
+        options = self.get_options(answer_key, pks)
         data['game'] = self.game
+        data['answer_key'] = answer_key
+        data['options'] = [options[pk] for pk in pks if pk in options]
+        return data
+
+    def get_context_data(self, **kwargs):
+        data = super(GameAdmin, self).get_context_data(**kwargs)
+        data['page_obj'] = self.page
         return data
 
     def form_valid(self, form):
-        options = list(self.game.option_set.all())
+        # Compare against the rows loaded by the form and only write
+        # the options and slots that were actually changed.
+        options = list(form.option_keys.values())
+        old_options = {o.pk: (o.kind, o.alias_target_id) for o in options}
         new_options = []
         for option_text in form.cleaned_data['new_options']:
             option = Option(game=self.game, text=option_text,
@@ -132,6 +249,16 @@ class GameAdmin(FormView):
             option.clean()
             new_options.append(option)
         option_map = {o.text: o for o in options + new_options}
+        # Alias targets and keys on other pages of options
+        texts = set(form.cleaned_option(o)['alias_target'] for o in options)
+        texts.update(form.cleaned_slot(s)['key']
+                     for s in form.slot_keys.values())
+        option_ids = form.answer_key.option_ids
+        others = self.get_options(
+            form.answer_key, [option_ids[text] for text in texts
+                              if text in option_ids and
+                              text not in option_map])
+        option_map.update((o.text, o) for o in others.values())
         for option in options:
             data = form.cleaned_option(option)
             target = data['alias_target']
@@ -144,7 +271,8 @@ class GameAdmin(FormView):
                 option.alias_target = option_map[target]
             option.clean()
 
-        slots = list(self.game.slot_set.all())
+        slots = list(form.slot_keys.values())
+        old_slots = {s.pk: (s.position, s.stem, s.key_id) for s in slots}
         for slot in slots:
             data = form.cleaned_slot(slot)
             slot.position = data['position']
@@ -156,76 +284,147 @@ class GameAdmin(FormView):
 
         next_position = len(slots) + 1
 
-        for stem in form.cleaned_data['new_slots']:
-            slots.append(Slot(
-                game=self.game,
-                position=next_position,
-                stem=stem,
-                key=None))
-
-        for o in new_options + options:
-            o.alias_target = o.alias_target  # Update alias_target_id
-            o.save()
-        for s in slots:
-            s.key = s.key  # Update key_id
-            s.save()
-
-        self.game.mode = form.cleaned_data['mode']
-        self.game.save()
-
-        return redirect('game_admin', pk=self.game.pk)
+        new_slots = [
+            Slot(game=self.game, position=next_position, stem=stem, key=None)
+            for stem in form.cleaned_data['new_slots']]
+
+        with transaction.atomic():
+            if new_options:
+                bulk_create_options(self.game, new_options)
+            for o in options:
+                o.alias_target = o.alias_target  # Update alias_target_id
+            dirty_options = [
+                o for o in options
+                if (o.kind, o.alias_target_id) != old_options[o.pk]]
+            bulk_update(dirty_options, ['kind', 'alias_target'])
+
+            for s in slots:
+                s.key = s.key  # Update key_id
+            dirty_slots = [
+                s for s in slots
+                if (s.position, s.stem, s.key_id) != old_slots[s.pk]]
+            bulk_update(dirty_slots, ['position', 'stem', 'key'])
+            Slot.objects.bulk_create(new_slots)
+
+            dirty_keys = any(s.key_id != old_slots[s.pk][2]
+                             for s in dirty_slots)
+            if dirty_options or dirty_keys:
+                if update_feedback(self.game):
+                    rebuild_standings(self.game)
+            if new_options or dirty_options or new_slots or dirty_slots:
+                self.game.bump_version()
+
+            if self.game.mode != form.cleaned_data['mode']:
+                self.game.mode = form.cleaned_data['mode']
+                self.game.save(update_fields=['mode'])
+                invalidate_open_games()
+
+        url = reverse('game_admin', kwargs={'pk': self.game.pk})
+        if self.request.GET:
+            url += '?' + self.request.GET.urlencode()
+        return redirect(url)
 
 
 @single_game_admin
 class GameUnconfirmedOptions(FormView):
     template_name = 'mastermind/game_unconfirmed_options.html'
     form_class = GameUnconfirmedOptionsForm
+    paginate_by = 100
+    orderings = {
+        'frequency': ('-usage', 'text'),
+        'text': ('text',),
+    }
+
+    def get_filters(self):
+        q = self.request.GET.get('q', '').strip()
+        sort = self.request.GET.get('sort')
+        if sort not in self.orderings:
+            sort = 'frequency'
+        return q, sort
 
     def get_options(self):
-        return Option.objects.filter(game=self.game, kind=Option.UNCONFIRMED)
+        qs = Option.objects.filter(game=self.game, kind=Option.UNCONFIRMED)
+        # Packed submissions have no SubmissionSlots to count
+        qs = qs.annotate(usage=ExpressionWrapper(
+            Count('submissionslot') + F('packed_usage'),
+            output_field=IntegerField()))
+        if self.request.method == 'POST':
+            # Only the options on the page that was submitted
+            pks = [int(k[2:]) for k in self.request.POST
+                   if k.startswith('o-') and k[2:].isdigit()]
+            qs = qs.filter(pk__in=pks).order_by('-usage', 'text')
+            return qs, None
+        q, sort = self.get_filters()
+        if q:
+            qs = qs.filter(text__icontains=q)
+        qs = qs.order_by(*self.orderings[sort])
+        paginator = Paginator(qs, self.paginate_by)
+        try:
+            page = paginator.page(self.request.GET.get('page', 1))
+        except PageNotAnInteger:
+            page = paginator.page(1)
+        except EmptyPage:
+            page = paginator.page(paginator.num_pages)
+        return page.object_list, page
+
+    def get_suggestions(self, options):
+        answer_key = get_answer_key(self.game)
+        index = get_match_index(self.game, answer_key)
+        suggestions = index.suggest(o.text for o in options)
+        return {text: answer_key.options_by_pk[pk].text
+                for text, pk in suggestions.items()}
 
     def get_form_kwargs(self, **kwargs):
         data = super(GameUnconfirmedOptions, self).get_form_kwargs(**kwargs)
-        data['options'] = self.get_options()
+        options, self.page = self.get_options()
+        options = list(options)
+        data['options'] = options
+        if self.request.method == 'POST':
+            # Only shown if the form is invalid, so leave them out
+            data['suggestions'] = {}
+        else:
+            data['suggestions'] = self.get_suggestions(options)
+        return data
+
+    def get_context_data(self, **kwargs):
+        data = super(GameUnconfirmedOptions, self).get_context_data(**kwargs)
+        q, sort = self.get_filters()
+        data['q'] = q
+        data['sort'] = sort
+        data['page_obj'] = self.page
+        data['filter_query'] = urlencode({'q': q, 'sort': sort})
         return data
 
     def form_valid(self, form):
+        new_options = []
+        errors = False
+        save_options = []
         canonical_texts = {}
         for o in form.options:
             k = 'o-%s' % o.pk
             c = form.cleaned_data[k]
             if not c:
                 continue
+            if c == o.text:
+                o.kind = Option.CANONICAL
+                save_options.append(o)
+                continue
             canonical_texts[o] = c
-        qs = Option.objects.filter(
-            game=self.game, text__in=canonical_texts.values())
-        existing = {o.text: o for o in qs}
-        new_options = []
-        errors = False
-        save_options = []
+        existing = get_answer_key(self.game).get_options_by_text(
+            self.game, canonical_texts.values())
         for o, c in canonical_texts.items():
             try:
                 canonical = existing[c]
             except KeyError:
-                if c == o.text:
-                    o.kind = Option.CANONICAL
-                    save_options.append(o)
-                    continue
-                else:
-                    canonical = Option(
-                        game=self.game, kind=Option.CANONICAL, text=c)
-                    try:
-                        canonical.clean()
-                    except ValidationError as exn:
-                        form.add_error(None, exn)
-                        return self.form_invalid(form)
-                    existing[c] = canonical
-                    new_options.append(canonical)
-            else:
-                if o == canonical:
-                    o.kind = Option.CANONICAL
-                    save_options.append(o)
-                    continue
+                canonical = Option(
+                    game=self.game, kind=Option.CANONICAL, text=c)
+                try:
+                    canonical.clean()
+                except ValidationError as exn:
+                    form.add_error(None, exn)
+                    return self.form_invalid(form)
+                existing[c] = canonical
+                new_options.append(canonical)
             k = 'o-%s' % o.pk
             if canonical.is_alias:
                 form.add_error(
@@ -246,12 +445,38 @@ class GameUnconfirmedOptions(FormView):
         except ValidationError as exn:
             form.add_error(None, exn)
             return self.form_invalid(form)
-        for o in new_options:
-            o.save()
-        for o in save_options:
-            o.alias_target = o.alias_target
-            o.save()
-        return redirect('game_admin', pk=self.game.pk)
+        with transaction.atomic():
+            if new_options:
+                bulk_create_options(self.game, new_options)
+            for o in save_options:
+                # Set alias_target_id now that the target has a pk
+                o.alias_target = o.alias_target
+            bulk_update(save_options, ['kind', 'alias_target'])
+            if save_options:
+                if update_feedback(self.game):
+                    rebuild_standings(self.game)
+            if new_options or save_options:
+                self.game.bump_version()
+        url = reverse('game_unconfirmed_options', kwargs={'pk': self.game.pk})
+        if self.request.GET:
+            url += '?' + self.request.GET.urlencode()
+        return redirect(url)
+
+
+@single_game_admin
+class GameLeaderboard(TemplateView):
+    template_name = 'mastermind/game_leaderboard.html'
+
+    def get_context_data(self, **kwargs):
+        data = super(GameLeaderboard, self).get_context_data(**kwargs)
+        standings = Standing.objects.filter(game=self.game)
+        standings = standings.order_by(
+            '-best_correct', '-best_other', 'submission_count')
+        standings = standings.select_related(
+            'profile', 'profile__user', 'best_submission')
+        data['standings'] = standings
+        data['key_count'] = self.game.slot_set.exclude(key=None).count()
+        return data
 
 
 @single_game
@@ -259,17 +484,30 @@ class GameSubmission(FormView):
     form_class = GameSubmissionForm
     template_name = 'mastermind/game_submission.html'
 
+    @cached_property
+    def answer_key(self):
+        return get_answer_key(self.game)
+
+    def get_etag(self, request):
+        # The page only changes with the game and the player's guesses.
+        profile = request.profile
+        if not profile:
+            return game_etag(self.game, None, 0)
+        counts = Standing.objects.filter(game=self.game, profile=profile)
+        counts = counts.order_by().values_list('submission_count', flat=True)
+        return game_etag(self.game, profile.pk, counts[0] if counts else 0)
+
     def get_context_data(self, **kwargs):
         data = super(GameSubmission, self).get_context_data(**kwargs)
-        slots = list(self.game.slot_set.all())
-        correct_options = set(s.key for s in slots if s.key is not None)
+        slots = self.answer_key.get_slots(self.game)
         if self.request.profile:
             submissions = Submission.objects.filter(
                 profile=self.request.profile, game=self.game)
-            submission_slot_qs = SubmissionSlot.objects.filter(
-                submission__in=submissions)
-            submission_slots = {(ss.submission, ss.slot): ss.option
-                                for ss in submission_slot_qs}
+            submissions = list(submissions.order_by('created_time'))
+            submission_slots = {
+                (ss.submission_id, ss.slot_id): ss
+                for ss in get_submission_slots(
+                    self.game, self.answer_key, submissions)}
         else:
             submissions = []
 
@@ -278,30 +516,34 @@ class GameSubmission(FormView):
             row = []
             for slot in slots:
                 try:
-                    chosen = submission_slots[submission, slot]
+                    ss = submission_slots[submission.pk, slot.pk]
                 except KeyError:
                     row.append(dict())
                     continue
-                if chosen.kind == Option.ALIAS:
-                    option = chosen.alias_target
-                else:
-                    option = chosen
-                if slot.key is None or option.kind == Option.UNCONFIRMED:
-                    information = '?'  # 'unknown'
-                elif slot.key == option:
-                    information = '\N{BLACK CIRCLE}'  # 'correct'
-                elif option in correct_options:
-                    information = '\N{WHITE CIRCLE}'  # 'other'
-                else:
-                    information = '\N{HEAVY BALLOT X}'  # 'wrong'
-                row.append(dict(option=chosen, information=information))
+                row.append(dict(option=ss.option,
+                                information=ss.get_feedback_display()))
             rows.append(dict(submission=submission, slots=row))
         data['slots'] = slots
         data['submissions'] = rows
+        if rows:
+            data['suggestion'] = self.get_suggestion(
+                submission_slots.values())
         return data
 
+    def get_suggestion(self, submission_slots):
+        solver = Solver.for_answer_key(self.answer_key)
+        for ss in submission_slots:
+            option_id = self.answer_key.canonical_ids.get(ss.option_id)
+            solver.add(ss.slot_id, option_id, ss.feedback, propagate=False)
+        solver.propagate()
+        if not solver.consistent:
+            return None
+        options = self.answer_key.options_by_pk
+        return [options[pk].text if pk is not None else ''
+                for pk in solver.suggest()]
+
     def get_form_kwargs(self, **kwargs):
-        slots = self.game.slot_set.all()
+        slots = self.answer_key.get_slots(self.game)
         slots_initial = {}
         if self.request.profile:
             try:
@@ -310,30 +552,108 @@ class GameSubmission(FormView):
             except Submission.DoesNotExist:
                 pass
             else:
-                for s in submission.submissionslot_set.all():
-                    slots_initial[s.slot] = s.option.text
+                slots_initial = {
+                    ss.slot_id: ss.option.text
+                    for ss in get_submission_slots(
+                        self.game, self.answer_key, [submission])}
         data = super(GameSubmission, self).get_form_kwargs(**kwargs)
         data['game'] = self.game
+        data['answer_key'] = self.answer_key
         data['slots'] = slots
         data['slots_initial'] = slots_initial
         return data
 
     def form_valid(self, form):
-        profile = self.request.get_or_create_profile()
-        submission = Submission(profile=profile, game=self.game)
-        slots = []
-        for slot in form.slots:
-            k = 's-%s' % slot.pk
-            option = form.cleaned_data[k]
-            if option is None:
-                continue
-            if not option.pk:
-                option.save()
-            slots.append(SubmissionSlot(submission=submission,
-                                        slot=slot,
-                                        option=option))
-        submission.save()
-        for s in slots:
-            s.submission = s.submission  # Update submission_id
-            s.save()
+        form.save(self.request.get_or_create_profile())
         return redirect('game_submission_create', pk=self.game.pk)
+
+
+class Stats(TemplateView):
+    template_name = 'mastermind/stats.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_superuser:
+            return permission_denied(request, exception=None)
+        return super(Stats, self).dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        data = super(Stats, self).get_context_data(**kwargs)
+        data['views'] = histogram.snapshot()
+        data['buckets'] = BUCKETS
+        return data
+
+
+@single_game_admin
+class GameExport(View):
+    def get(self, request):
+        try:
+            iter_lines, content_type = FORMATS[request.GET.get('format')]
+        except KeyError:
+            return page_not_found(request, exception=None)
+        response = StreamingHttpResponse(
+            iter_lines(self.game), content_type=content_type)
+        response['Content-Disposition'] = (
+            'attachment; filename="game-%s.%s"' %
+            (self.game.pk, request.GET['format']))
+        return response
+
+
+@single_game
+class GameApi(View):
+    """JSON API for clients that guess without the HTML page.
+
+    GET returns the slots and canonical options of the game as lists of
+    [id, text] pairs. POST takes a JSON object mapping slot ids to texts
+    or null, validates and saves it like GameSubmission and returns the
+    feedback of the guess as a list in the order of the slots, with null
+    for slots left empty. POSTs need the CSRF token from the csrftoken
+    cookie set by GET in the X-CSRFToken header.
+    """
+
+    def get_etag(self, request):
+        return game_etag(self.game)
+
+    @method_decorator(ensure_csrf_cookie)
+    def get(self, request):
+        answer_key = get_answer_key(self.game)
+        return JsonResponse({
+            'id': self.game.pk,
+            'title': self.game.title,
+            'slots': [[pk, stem] for pk, position, stem, key_id
+                      in answer_key.slots],
+            'options': [[pk, text] for pk, kind, alias_target_id, text
+                        in answer_key.options
+                        if kind == Option.CANONICAL],
+        })
+
+    def post(self, request):
+        try:
+            answers = json.loads(request.body.decode('utf-8'))
+        except ValueError:
+            answers = None
+        if not isinstance(answers, dict):
+            return JsonResponse({'errors': {'__all__': ['Ugyldig JSON']}},
+                                status=400)
+        answer_key = get_answer_key(self.game)
+        slot_ids = set('%s' % pk for pk in answer_key.slot_keys)
+        errors = {}
+        for k, v in answers.items():
+            if k not in slot_ids:
+                errors[k] = ['Ukendt indgang']
+            elif v is not None and not isinstance(v, six.string_types):
+                errors[k] = ['Skal være en tekst eller null']
+        if errors:
+            return JsonResponse({'errors': errors}, status=400)
+        form = GameSubmissionForm(
+            data={'s-%s' % k: v for k, v in answers.items()},
+            game=self.game, answer_key=answer_key,
+            slots=answer_key.get_slots(self.game), slots_initial={})
+        if not form.is_valid():
+            errors = {k: list(v) for k, v in form.errors.items()}
+            return JsonResponse({'errors': errors}, status=400)
+        submission, slots = form.save(request.get_or_create_profile())
+        feedback = {s.slot_id: s.feedback for s in slots}
+        return JsonResponse({
+            'id': submission.pk,
+            'feedback': [feedback.get(s.pk) for s in form.slots],
+        })